@@ -1,12 +1,14 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy import text
 from alembic import context
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.db.session import DATABASE_URL
+from app.db.migration_utils import migration_engine_options
 from app.models import Base
 
 # this is the Alembic Config object, which provides
@@ -26,6 +28,8 @@ config.set_main_option('sqlalchemy.url', DATABASE_URL)
 
 target_metadata = Base.metadata
 
+MIGRATION_LOCK_KEY = 'capstone_alembic'
+
 
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
@@ -59,13 +63,29 @@ def run_migrations_online():
         config.get_section(config.config_ini_section),
         prefix='sqlalchemy.',
         poolclass=pool.NullPool,
+        **migration_engine_options(config.get_main_option('sqlalchemy.url')),
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
-
-        with context.begin_transaction():
-            context.run_migrations()
+        # Serialise concurrent runners (e.g. two instances booting at once).
+        # A session-level lock is used because the autocommit blocks in some
+        # revisions commit the migration transaction, which would release an
+        # xact lock part-way through the chain.
+        use_lock = connection.dialect.name == 'postgresql'
+        if use_lock:
+            connection.execute(text("SELECT pg_advisory_lock(hashtext(:key))"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if use_lock:
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
 
 
 if context.is_offline_mode():
@@ -18,4 +18,7 @@ def upgrade():
     op.drop_column('users', 'department')
 
 def downgrade():
-    op.add_column('users', sa.Column('department', sa.String(length=30), nullable=False))
\ No newline at end of file
+    # A constant default lets PG add the NOT NULL column without rewriting
+    # the table (and without failing on existing rows); drop it afterwards
+    op.add_column('users', sa.Column('department', sa.String(length=30), nullable=False, server_default=''))
+    op.alter_column('users', 'department', server_default=None)
\ No newline at end of file
@@ -7,6 +7,7 @@ Create Date: 2025-08-18 00:00:00.000000
 
 from alembic import op
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
 
 # revision identifiers, used by Alembic.
 revision = '0003_create_activity_logs'
@@ -23,7 +24,7 @@ def upgrade():
         sa.Column('target_type', sa.String(length=50), nullable=True),
         sa.Column('target_id', sa.Integer, nullable=True),
         sa.Column('message', sa.String(length=500), nullable=True),
-    sa.Column('log_metadata', sa.JSON, nullable=True),
+    sa.Column('log_metadata', JSONB, nullable=True),
     sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
     # Indexes for common queries
@@ -26,10 +26,7 @@ def upgrade():
         sa.Column('address', sa.String(length=200), nullable=True),
         sa.Column('postal_code', sa.String(length=10), nullable=True),
     )
-    # Optional index to speed up lookups by email; unique is already enforced above
-    op.create_index('ix_clients_email', 'clients', ['email'], unique=True)
 
 
 def downgrade():
-    op.drop_index('ix_clients_email', table_name='clients')
     op.drop_table('clients')
\ No newline at end of file
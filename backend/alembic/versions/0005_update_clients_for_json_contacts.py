@@ -8,6 +8,9 @@ Create Date: 2025-01-21 00:00:00.000000
 from alembic import op
 import sqlalchemy as sa
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.migration_utils import index_build_settings, update_in_pages
 
 # revision identifiers, used by Alembic.
 revision = '0005_json_contacts'
@@ -20,31 +23,80 @@ def upgrade():
     # Add new columns
     op.add_column('clients', sa.Column('uen', sa.String(50), nullable=True))
     op.add_column('clients', sa.Column('industry', sa.String(100), nullable=True))
-    op.add_column('clients', sa.Column('contacts', sa.JSON(), nullable=True))
+    op.add_column('clients', sa.Column('contacts', JSONB(), nullable=True))
     
-    # Migrate existing data: convert single contact/email into JSON array
-    connection = op.get_bind()
-    connection.execute(text("""
-        UPDATE clients 
-        SET contacts = json_build_array(
-            json_build_object(
+    # Migrate existing data: convert single contact/email into JSON array.
+    # Paged so each batch of clients commits on its own instead of holding
+    # one long transaction over the whole table.
+    update_in_pages("""
+        UPDATE clients
+        SET contacts = jsonb_build_array(
+            jsonb_build_object(
                 'name', contact_name,
                 'phone', contact_phone,
                 'email', email
             )
         )
-        WHERE contacts IS NULL
-    """))
-    
+        WHERE id IN (
+            SELECT id FROM clients
+            WHERE id > :last_id AND contacts IS NULL
+            ORDER BY id
+            LIMIT :page_size
+        )
+        RETURNING id
+    """)
+
     # Make contacts NOT NULL after migration
     op.alter_column('clients', 'contacts', nullable=False)
+
+    # clients.email was unique case-sensitively, but the primary email index
+    # below (like the API) treats addresses case-insensitively; stop with a
+    # clear message rather than pick which client keeps a shared address
+    duplicates = op.get_bind().execute(text("""
+        SELECT lower(contacts->0->>'email') FROM clients
+        WHERE contacts->0->>'email' IS NOT NULL
+        GROUP BY 1 HAVING count(*) > 1
+    """)).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"clients share these emails when compared case-insensitively: {', '.join(duplicates)}. "
+            "Change the extra clients' emails, then rerun this migration."
+        )
+
+    # Indexes on the existing clients table are built CONCURRENTLY so writes
+    # are not blocked while they build (not allowed inside a transaction)
+    with op.get_context().autocommit_block(), index_build_settings():
+        # GIN (jsonb_path_ops) index serves contact email lookups via @> containment
+        op.create_index(
+            'ix_clients_contacts_gin', 'clients', ['contacts'],
+            postgresql_using='gin', postgresql_ops={'contacts': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+        )
+
+        # ->> is not GIN-indexable; keep point lookups and uniqueness on the
+        # primary contact email (formerly UNIQUE clients.email) on a B-tree,
+        # lowercased to match the API's case-insensitive duplicate check
+        try:
+            op.execute("""
+                CREATE UNIQUE INDEX CONCURRENTLY ix_clients_primary_email
+                ON clients ((lower(contacts->0->>'email')))
+            """)
+        except Exception:
+            # A duplicate written since the check leaves the concurrent build
+            # behind as an INVALID index; drop it so the migration can rerun
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_clients_primary_email")
+            raise
     
-    # Drop old columns and their constraints
-    op.drop_index('ix_clients_email', table_name='clients')
+    # Drop old columns (the email unique constraint goes with its column)
     op.drop_column('clients', 'contact_name')
     op.drop_column('clients', 'contact_phone')
     op.drop_column('clients', 'email')
 
+    # The backfill left one dead tuple per client; reclaim them and refresh
+    # planner stats for the new contacts column (VACUUM can't run in a transaction)
+    with op.get_context().autocommit_block():
+        op.execute("VACUUM (ANALYZE) clients")
+
 
 def downgrade():
     # Add back old columns
@@ -52,21 +104,25 @@ def downgrade():
     op.add_column('clients', sa.Column('contact_phone', sa.String(20), nullable=True))
     op.add_column('clients', sa.Column('email', sa.String(50), nullable=True))
     
-    # Migrate data back: extract first contact from JSON
+    # Migrate data back: extract first contact from JSON, pulling contacts->0
+    # out once per row in the subselect instead of once per column
     connection = op.get_bind()
     connection.execute(text("""
-        UPDATE clients 
-        SET 
-            contact_name = contacts->0->>'name',
-            contact_phone = contacts->0->>'phone',
-            email = contacts->0->>'email'
-        WHERE contacts IS NOT NULL
+        UPDATE clients
+        SET (contact_name, contact_phone, email) =
+            (first.contact->>'name', first.contact->>'phone', first.contact->>'email')
+        FROM (
+            SELECT id, contacts->0 AS contact
+            FROM clients
+            WHERE contacts IS NOT NULL
+        ) AS first
+        WHERE clients.id = first.id
     """))
     
     # Make old columns NOT NULL and restore constraints
     op.alter_column('clients', 'contact_name', nullable=False)
     op.alter_column('clients', 'email', nullable=False)
-    op.create_index('ix_clients_email', 'clients', ['email'], unique=True)
+    op.create_unique_constraint('clients_email_key', 'clients', ['email'])
     
     # Drop new columns
     op.drop_column('clients', 'contacts')
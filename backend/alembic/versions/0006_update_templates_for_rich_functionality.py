@@ -9,6 +9,8 @@ from alembic import op
 import sqlalchemy as sa
 from sqlalchemy.dialects import postgresql
 
+from app.db.migration_utils import index_build_settings
+
 # revision identifiers, used by Alembic.
 revision = '0006_update_templates'
 down_revision = 'df0000e2f4e2'
@@ -18,23 +20,35 @@ depends_on = None
 
 def upgrade():
     # Add new columns to templates table
-    op.add_column('templates', sa.Column('content', postgresql.JSON(), nullable=True))
-    op.add_column('templates', sa.Column('variables', postgresql.JSON(), nullable=True))
+    op.add_column('templates', sa.Column('content', postgresql.JSONB(), nullable=True))
+    op.add_column('templates', sa.Column('variables', postgresql.JSONB(), nullable=True))
     op.add_column('templates', sa.Column('is_ai_enhanced', sa.Boolean(), server_default='false', nullable=False))
     op.add_column('templates', sa.Column('created_by', sa.Integer(), nullable=True))
 
-    # Modify existing columns
-    op.alter_column('templates', 'name', existing_type=sa.String(length=100), type_=sa.String(length=200))
-    op.alter_column('templates', 'description', existing_type=sa.String(length=500), type_=sa.Text())
+    # Modify existing columns; widening varchar and varchar -> text without a
+    # USING clause is catalog-only in PG, so no table rewrite
+    op.execute("ALTER TABLE templates ALTER COLUMN name TYPE varchar(200)")
+    op.execute("ALTER TABLE templates ALTER COLUMN description TYPE text")
     op.alter_column('templates', 'status', server_default='unsaved')
     op.alter_column('templates', 'updated_at', server_default=sa.text('now()'), nullable=False)
 
-    # Create foreign key constraint
-    op.create_foreign_key('fk_templates_created_by', 'templates', 'users', ['created_by'], ['id'])
+    # Create foreign key constraint without scanning existing rows under the
+    # ALTER TABLE lock; it is validated separately below
+    op.execute("""
+        ALTER TABLE templates
+        ADD CONSTRAINT fk_templates_created_by
+        FOREIGN KEY (created_by) REFERENCES users (id) NOT VALID
+    """)
+
+    # Create indexes CONCURRENTLY and validate the FK outside the migration
+    # transaction; both only take SHARE UPDATE EXCLUSIVE, so reads and
+    # writes on templates continue
+    with op.get_context().autocommit_block():
+        with index_build_settings():
+            op.create_index('ix_templates_created_by', 'templates', ['created_by'], postgresql_concurrently=True)
+            op.create_index('ix_templates_updated_at', 'templates', ['updated_at'], postgresql_concurrently=True)
 
-    # Create indexes
-    op.create_index('ix_templates_created_by', 'templates', ['created_by'])
-    op.create_index('ix_templates_updated_at', 'templates', ['updated_at'])
+        op.execute("ALTER TABLE templates VALIDATE CONSTRAINT fk_templates_created_by")
 
 
 def downgrade():
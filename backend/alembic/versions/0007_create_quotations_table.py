@@ -7,7 +7,7 @@ Create Date: 2025-10-08 00:00:00.000000
 
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 
 # revision identifiers, used by Alembic.
 revision = '0007_create_quotations_table'
@@ -24,7 +24,7 @@ def upgrade():
 
         # Client relationship
         sa.Column('client_id', sa.Integer, sa.ForeignKey('clients.id'), nullable=False, index=True),
-        sa.Column('selected_contact', JSON, nullable=False),
+        sa.Column('selected_contact', JSONB, nullable=False),
 
         # Template relationship
         sa.Column('template_id', sa.Integer, sa.ForeignKey('templates.id'), nullable=False, index=True),
@@ -35,7 +35,7 @@ def upgrade():
         sa.Column('file_size', sa.Integer, nullable=True),
 
         # Status tracking
-        sa.Column('status', sa.String(length=50), nullable=False, server_default='draft', index=True),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='draft'),
 
         # Additional quotation details
         sa.Column('amount', sa.Integer, nullable=True),
@@ -44,7 +44,7 @@ def upgrade():
         sa.Column('notes', sa.Text, nullable=True),
 
         # Placeholder tracking
-        sa.Column('unfilled_placeholders', JSON, nullable=True),
+        sa.Column('unfilled_placeholders', JSONB, nullable=True),
 
         # Metadata
         sa.Column('created_by', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
@@ -52,6 +52,22 @@ def upgrade():
         sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), onupdate=sa.text('NOW()'), nullable=False),
     )
 
+    # Partial index: only open quotations are looked up by status
+    op.create_index(
+        'ix_quotations_status_active', 'quotations', ['status'],
+        postgresql_where=sa.text("status IN ('pending', 'unpaid')"),
+    )
+
+    # GIN (jsonb_path_ops) indexes serve @> containment lookups on the JSON columns
+    op.create_index(
+        'ix_quotations_selected_contact_gin', 'quotations', ['selected_contact'],
+        postgresql_using='gin', postgresql_ops={'selected_contact': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_quotations_unfilled_placeholders_gin', 'quotations', ['unfilled_placeholders'],
+        postgresql_using='gin', postgresql_ops={'unfilled_placeholders': 'jsonb_path_ops'},
+    )
+
 
 def downgrade():
     op.drop_table('quotations')
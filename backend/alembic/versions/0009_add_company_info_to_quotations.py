@@ -7,7 +7,9 @@ Create Date: 2025-10-10 00:00:00.000000
 
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.migration_utils import index_build_settings
 
 # revision identifiers, used by Alembic.
 revision = '0009_add_company_info'
@@ -18,7 +20,15 @@ depends_on = None
 
 def upgrade():
     # Add my_company_info JSON column to quotations table
-    op.add_column('quotations', sa.Column('my_company_info', JSON, nullable=True))
+    op.add_column('quotations', sa.Column('my_company_info', JSONB, nullable=True))
+
+    # Build the GIN index CONCURRENTLY so quotation writes are not blocked
+    with op.get_context().autocommit_block(), index_build_settings():
+        op.create_index(
+            'ix_quotations_my_company_info_gin', 'quotations', ['my_company_info'],
+            postgresql_using='gin', postgresql_ops={'my_company_info': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+        )
 
 
 def downgrade():
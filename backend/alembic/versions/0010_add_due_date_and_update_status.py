@@ -9,6 +9,8 @@ from alembic import op
 import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 
+from app.db.migration_utils import update_in_pages
+
 # revision identifiers, used by Alembic.
 revision = '0010_add_due_date_status'
 down_revision = '0009_add_company_info'
@@ -22,12 +24,30 @@ def upgrade():
 
     # Update existing status values from old system to new system
     # Map: draft -> unpaid, sent -> unpaid, accepted -> paid, rejected -> unpaid, expired -> unpaid
-    op.execute("""
+    # Only rows whose value actually changes are touched; 'accepted' is
+    # excluded from the first pass so the second can still find it.
+    update_in_pages("""
         UPDATE quotations
-        SET status = CASE
-            WHEN status = 'accepted' THEN 'paid'
-            ELSE 'unpaid'
-        END
+        SET status = 'unpaid'
+        WHERE id IN (
+            SELECT id FROM quotations
+            WHERE id > :last_id AND status NOT IN ('accepted', 'unpaid')
+            ORDER BY id
+            LIMIT :page_size
+        )
+        RETURNING id
+    """)
+
+    update_in_pages("""
+        UPDATE quotations
+        SET status = 'paid'
+        WHERE id IN (
+            SELECT id FROM quotations
+            WHERE id > :last_id AND status = 'accepted'
+            ORDER BY id
+            LIMIT :page_size
+        )
+        RETURNING id
     """)
 
 
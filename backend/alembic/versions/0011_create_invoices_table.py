@@ -7,7 +7,7 @@ Create Date: 2025-10-14 00:00:00.000000
 
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSON, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
 
 # revision identifiers, used by Alembic.
 revision = '0011_create_invoices_table'
@@ -27,13 +27,13 @@ def upgrade():
 
         # Client relationship (copied from quotation)
         sa.Column('client_id', sa.Integer, sa.ForeignKey('clients.id'), nullable=False, index=True),
-        sa.Column('selected_contact', JSON, nullable=False),
+        sa.Column('selected_contact', JSONB, nullable=False),
 
         # Template relationship
         sa.Column('template_id', sa.Integer, sa.ForeignKey('templates.id'), nullable=False, index=True),
 
         # User's company information
-        sa.Column('my_company_info', JSON, nullable=True),
+        sa.Column('my_company_info', JSONB, nullable=True),
 
         # Invoice document
         sa.Column('file_path', sa.String(length=500), nullable=True),
@@ -44,10 +44,10 @@ def upgrade():
         sa.Column('due_date', TIMESTAMP(timezone=True), nullable=True),
 
         # Status tracking
-        sa.Column('status', sa.String(length=50), nullable=False, server_default='unpaid', index=True),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='unpaid'),
 
         # Placeholder tracking
-        sa.Column('unfilled_placeholders', JSON, nullable=True),
+        sa.Column('unfilled_placeholders', JSONB, nullable=True),
 
         # Metadata
         sa.Column('created_by', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
@@ -55,6 +55,26 @@ def upgrade():
         sa.Column('updated_at', TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
     )
 
+    # Partial index: only unpaid invoices are looked up by status
+    op.create_index(
+        'ix_invoices_status_unpaid', 'invoices', ['status'],
+        postgresql_where=sa.text("status = 'unpaid'"),
+    )
+
+    # GIN (jsonb_path_ops) indexes serve @> containment lookups on the JSON columns
+    op.create_index(
+        'ix_invoices_selected_contact_gin', 'invoices', ['selected_contact'],
+        postgresql_using='gin', postgresql_ops={'selected_contact': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_invoices_my_company_info_gin', 'invoices', ['my_company_info'],
+        postgresql_using='gin', postgresql_ops={'my_company_info': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_invoices_unfilled_placeholders_gin', 'invoices', ['unfilled_placeholders'],
+        postgresql_using='gin', postgresql_ops={'unfilled_placeholders': 'jsonb_path_ops'},
+    )
+
 
 def downgrade():
     op.drop_table('invoices')
@@ -8,6 +8,8 @@ Create Date: 2025-10-14 02:00:00.000000
 from alembic import op
 import sqlalchemy as sa
 
+from app.db.migration_utils import update_in_pages
+
 # revision identifiers, used by Alembic.
 revision = '0012_update_quotation_status'
 down_revision = '0011_create_invoices_table'
@@ -18,13 +20,30 @@ depends_on = None
 def upgrade():
     # Update existing quotation status values
     # Map: unpaid -> pending, paid -> accepted
-    op.execute("""
+    # Only rows whose value actually changes are touched; 'paid' is
+    # excluded from the first pass so the second can still find it.
+    update_in_pages("""
         UPDATE quotations
-        SET status = CASE
-            WHEN status = 'paid' THEN 'accepted'
-            WHEN status = 'unpaid' THEN 'pending'
-            ELSE 'pending'
-        END
+        SET status = 'pending'
+        WHERE id IN (
+            SELECT id FROM quotations
+            WHERE id > :last_id AND status NOT IN ('paid', 'pending')
+            ORDER BY id
+            LIMIT :page_size
+        )
+        RETURNING id
+    """)
+
+    update_in_pages("""
+        UPDATE quotations
+        SET status = 'accepted'
+        WHERE id IN (
+            SELECT id FROM quotations
+            WHERE id > :last_id AND status = 'paid'
+            ORDER BY id
+            LIMIT :page_size
+        )
+        RETURNING id
     """)
 
     # Update the default value for new quotations
@@ -7,7 +7,7 @@ Create Date: 2025-11-06 00:00:00.000000
 
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSON, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
 
 # revision identifiers, used by Alembic.
 revision = '0013_create_email_system_tables'
@@ -25,7 +25,7 @@ def upgrade():
         sa.Column('subject', sa.String(length=500), nullable=False),
         sa.Column('body', sa.Text, nullable=False),
         sa.Column('template_type', sa.String(length=50), nullable=False, index=True),
-        sa.Column('variables', JSON, nullable=True),
+        sa.Column('variables', JSONB, nullable=True),
         sa.Column('is_default', sa.Boolean, nullable=False, server_default='false'),
         sa.Column('created_by', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
         sa.Column('created_at', TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False, index=True),
@@ -36,20 +36,38 @@ def upgrade():
     op.create_table(
         'email_history',
         sa.Column('id', sa.Integer, primary_key=True, index=True),
-        sa.Column('recipient_email', sa.String(length=255), nullable=False, index=True),
+        sa.Column('recipient_email', sa.String(length=255), nullable=False),
         sa.Column('recipient_name', sa.String(length=255), nullable=True),
         sa.Column('subject', sa.String(length=500), nullable=False),
         sa.Column('body', sa.Text, nullable=False),
-        sa.Column('quotation_id', sa.Integer, sa.ForeignKey('quotations.id'), nullable=True, index=True),
-        sa.Column('invoice_id', sa.Integer, sa.ForeignKey('invoices.id'), nullable=True, index=True),
+        sa.Column('quotation_id', sa.Integer, sa.ForeignKey('quotations.id'), nullable=True),
+        sa.Column('invoice_id', sa.Integer, sa.ForeignKey('invoices.id'), nullable=True),
         sa.Column('email_template_id', sa.Integer, sa.ForeignKey('email_templates.id'), nullable=True),
         sa.Column('status', sa.String(length=50), nullable=False, server_default='sent', index=True),
         sa.Column('error_message', sa.Text, nullable=True),
-        sa.Column('attachments', JSON, nullable=True),
+        sa.Column('attachments', JSONB, nullable=True),
         sa.Column('sent_by', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
         sa.Column('sent_at', TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False, index=True),
     )
 
+    # Document links are mostly NULL; partial indexes keep only linked rows and
+    # still serve joins, document lookups and ON DELETE SET NULL
+    op.create_index(
+        'ix_email_history_quotation_id', 'email_history', ['quotation_id'],
+        postgresql_where=sa.text("quotation_id IS NOT NULL"),
+    )
+    op.create_index(
+        'ix_email_history_invoice_id', 'email_history', ['invoice_id'],
+        postgresql_where=sa.text("invoice_id IS NOT NULL"),
+    )
+
+    # Covering index for a recipient's timeline (index-only scan, newest first)
+    op.create_index(
+        'ix_email_history_recipient_time', 'email_history',
+        ['recipient_email', sa.text('sent_at DESC')],
+        postgresql_include=['subject', 'status'],
+    )
+
     # Create scheduled_emails table
     op.create_table(
         'scheduled_emails',
@@ -58,24 +76,45 @@ def upgrade():
         sa.Column('recipient_name', sa.String(length=255), nullable=True),
         sa.Column('subject', sa.String(length=500), nullable=False),
         sa.Column('body', sa.Text, nullable=False),
-        sa.Column('quotation_id', sa.Integer, sa.ForeignKey('quotations.id'), nullable=True, index=True),
-        sa.Column('invoice_id', sa.Integer, sa.ForeignKey('invoices.id'), nullable=True, index=True),
+        sa.Column('quotation_id', sa.Integer, sa.ForeignKey('quotations.id'), nullable=True),
+        sa.Column('invoice_id', sa.Integer, sa.ForeignKey('invoices.id'), nullable=True),
         sa.Column('email_template_id', sa.Integer, sa.ForeignKey('email_templates.id'), nullable=True),
         sa.Column('scheduled_time', TIMESTAMP(timezone=True), nullable=False, index=True),
         sa.Column('is_recurring', sa.Boolean, nullable=False, server_default='false'),
-        sa.Column('recurrence_pattern', JSON, nullable=True),
+        sa.Column('recurrence_pattern', JSONB, nullable=True),
         sa.Column('trigger_type', sa.String(length=50), nullable=True, index=True),
-        sa.Column('trigger_config', JSON, nullable=True),
-        sa.Column('status', sa.String(length=50), nullable=False, server_default='pending', index=True),
+        sa.Column('trigger_config', JSONB, nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='pending'),
         sa.Column('last_sent_at', TIMESTAMP(timezone=True), nullable=True),
         sa.Column('next_send_at', TIMESTAMP(timezone=True), nullable=True),
         sa.Column('error_message', sa.Text, nullable=True),
-        sa.Column('attachments', JSON, nullable=True),
+        sa.Column('attachments', JSONB, nullable=True),
         sa.Column('created_by', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
         sa.Column('created_at', TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False, index=True),
         sa.Column('updated_at', TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
     )
 
+    # Document links are mostly NULL; partial indexes keep only linked rows
+    op.create_index(
+        'ix_scheduled_emails_quotation_id', 'scheduled_emails', ['quotation_id'],
+        postgresql_where=sa.text("quotation_id IS NOT NULL"),
+    )
+    op.create_index(
+        'ix_scheduled_emails_invoice_id', 'scheduled_emails', ['invoice_id'],
+        postgresql_where=sa.text("invoice_id IS NOT NULL"),
+    )
+
+    # Partial indexes holding only the pending work queue; the scheduler
+    # polls scheduled_time <= now OR next_send_at <= now (bitmap OR)
+    op.create_index(
+        'ix_scheduled_emails_ready', 'scheduled_emails', ['next_send_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_index(
+        'ix_scheduled_emails_due', 'scheduled_emails', ['scheduled_time'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
     # Create notifications table
     op.create_table(
         'notifications',
@@ -85,7 +124,7 @@ def upgrade():
         sa.Column('notification_type', sa.String(length=50), nullable=False, index=True),
         sa.Column('related_type', sa.String(length=50), nullable=True),
         sa.Column('related_id', sa.Integer, nullable=True),
-        sa.Column('notification_metadata', JSON, nullable=True),
+        sa.Column('notification_metadata', JSONB, nullable=True),
         sa.Column('user_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False, index=True),
         sa.Column('is_read', sa.Boolean, nullable=False, server_default='false', index=True),
         sa.Column('read_at', TIMESTAMP(timezone=True), nullable=True),
@@ -24,116 +24,78 @@ def upgrade():
     op.add_column('scheduled_emails', sa.Column('document_number', sa.String(length=100), nullable=True))
     op.add_column('scheduled_emails', sa.Column('document_type', sa.String(length=20), nullable=True))
 
-    # Step 3: Create indexes for new columns
-    op.create_index('ix_email_history_document_number', 'email_history', ['document_number'])
-    op.create_index('ix_scheduled_emails_document_number', 'scheduled_emails', ['document_number'])
-
-    # Step 4: Drop existing foreign key constraints for email_history
-    op.drop_constraint('email_history_quotation_id_fkey', 'email_history', type_='foreignkey')
-    op.drop_constraint('email_history_invoice_id_fkey', 'email_history', type_='foreignkey')
-
-    # Step 5: Drop existing foreign key constraints for scheduled_emails
-    op.drop_constraint('scheduled_emails_quotation_id_fkey', 'scheduled_emails', type_='foreignkey')
-    op.drop_constraint('scheduled_emails_invoice_id_fkey', 'scheduled_emails', type_='foreignkey')
-
-    # Step 6: Recreate foreign keys with ON DELETE SET NULL for email_history
-    op.create_foreign_key(
-        'email_history_quotation_id_fkey',
-        'email_history', 'quotations',
-        ['quotation_id'], ['id'],
-        ondelete='SET NULL'
-    )
-    op.create_foreign_key(
-        'email_history_invoice_id_fkey',
-        'email_history', 'invoices',
-        ['invoice_id'], ['id'],
-        ondelete='SET NULL'
-    )
-
-    # Step 7: Recreate foreign keys with ON DELETE SET NULL for scheduled_emails
-    op.create_foreign_key(
-        'scheduled_emails_quotation_id_fkey',
-        'scheduled_emails', 'quotations',
-        ['quotation_id'], ['id'],
-        ondelete='SET NULL'
-    )
-    op.create_foreign_key(
-        'scheduled_emails_invoice_id_fkey',
-        'scheduled_emails', 'invoices',
-        ['invoice_id'], ['id'],
-        ondelete='SET NULL'
-    )
-
-    # Step 8: Populate document_number and document_type for existing records
-    # For email_history with quotations
-    op.execute("""
-        UPDATE email_history eh
-        SET document_number = q.quotation_number,
-            document_type = 'quotation'
-        FROM quotations q
-        WHERE eh.quotation_id = q.id
-        AND eh.quotation_id IS NOT NULL
-    """)
-
-    # For email_history with invoices
-    op.execute("""
-        UPDATE email_history eh
-        SET document_number = i.invoice_number,
-            document_type = 'invoice'
-        FROM invoices i
-        WHERE eh.invoice_id = i.id
-        AND eh.invoice_id IS NOT NULL
-    """)
-
-    # For scheduled_emails with quotations
-    op.execute("""
-        UPDATE scheduled_emails se
-        SET document_number = q.quotation_number,
-            document_type = 'quotation'
-        FROM quotations q
-        WHERE se.quotation_id = q.id
-        AND se.quotation_id IS NOT NULL
-    """)
-
-    # For scheduled_emails with invoices
-    op.execute("""
-        UPDATE scheduled_emails se
-        SET document_number = i.invoice_number,
-            document_type = 'invoice'
-        FROM invoices i
-        WHERE se.invoice_id = i.id
-        AND se.invoice_id IS NOT NULL
-    """)
+    # Step 3: Recreate the document foreign keys with ON DELETE SET NULL,
+    # dropping and adding both in a single ALTER TABLE per table so each
+    # table is locked once. NOT VALID skips the scan under that lock; the
+    # constraints are validated at the end
+    for table in ('email_history', 'scheduled_emails'):
+        op.execute(f"""
+            ALTER TABLE {table}
+                DROP CONSTRAINT {table}_quotation_id_fkey,
+                DROP CONSTRAINT {table}_invoice_id_fkey,
+                ADD CONSTRAINT {table}_quotation_id_fkey
+                    FOREIGN KEY (quotation_id) REFERENCES quotations (id) ON DELETE SET NULL NOT VALID,
+                ADD CONSTRAINT {table}_invoice_id_fkey
+                    FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE SET NULL NOT VALID
+        """)
+
+    # Step 4: Populate document_number and document_type for existing records.
+    # One UPDATE per table: quotation and invoice sources are combined so the
+    # target is rewritten once. A row linked to both keeps the invoice number,
+    # as before, so the quotation branch skips rows that have an invoice.
+    for table in ('email_history', 'scheduled_emails'):
+        op.execute(f"""
+            UPDATE {table} t
+            SET document_number = src.num,
+                document_type = src.typ
+            FROM (
+                SELECT e.id AS target_id, q.quotation_number AS num, 'quotation' AS typ
+                FROM quotations q
+                JOIN {table} e ON e.quotation_id = q.id
+                WHERE e.invoice_id IS NULL
+                UNION ALL
+                SELECT e.id, i.invoice_number, 'invoice'
+                FROM invoices i
+                JOIN {table} e ON e.invoice_id = i.id
+            ) src
+            WHERE t.id = src.target_id
+        """)
+
+    # Step 5: Index the new columns now that they are populated, so each row is
+    # indexed once in bulk instead of on every backfill UPDATE (partial: emails
+    # with no linked document never look up by number), and validate the
+    # foreign keys. Both run outside the migration transaction and only take
+    # SHARE UPDATE EXCLUSIVE, so reads and writes continue
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_email_history_document_number', 'email_history', ['document_number'],
+            postgresql_where=sa.text("document_number IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_scheduled_emails_document_number', 'scheduled_emails', ['document_number'],
+            postgresql_where=sa.text("document_number IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        for table in ('email_history', 'scheduled_emails'):
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_quotation_id_fkey")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_invoice_id_fkey")
 
 
 def downgrade():
-    # Step 1: Drop foreign keys with SET NULL
-    op.drop_constraint('email_history_quotation_id_fkey', 'email_history', type_='foreignkey')
-    op.drop_constraint('email_history_invoice_id_fkey', 'email_history', type_='foreignkey')
-    op.drop_constraint('scheduled_emails_quotation_id_fkey', 'scheduled_emails', type_='foreignkey')
-    op.drop_constraint('scheduled_emails_invoice_id_fkey', 'scheduled_emails', type_='foreignkey')
-
-    # Step 2: Recreate original foreign keys without ON DELETE
-    op.create_foreign_key(
-        'email_history_quotation_id_fkey',
-        'email_history', 'quotations',
-        ['quotation_id'], ['id']
-    )
-    op.create_foreign_key(
-        'email_history_invoice_id_fkey',
-        'email_history', 'invoices',
-        ['invoice_id'], ['id']
-    )
-    op.create_foreign_key(
-        'scheduled_emails_quotation_id_fkey',
-        'scheduled_emails', 'quotations',
-        ['quotation_id'], ['id']
-    )
-    op.create_foreign_key(
-        'scheduled_emails_invoice_id_fkey',
-        'scheduled_emails', 'invoices',
-        ['invoice_id'], ['id']
-    )
+    # Step 1-2: Swap the SET NULL foreign keys back to the original ones
+    # without ON DELETE, one ALTER TABLE per table. NOT VALID skips the
+    # re-validation scan: the SET NULL constraints already held for every row
+    for table in ('email_history', 'scheduled_emails'):
+        op.execute(f"""
+            ALTER TABLE {table}
+                DROP CONSTRAINT {table}_quotation_id_fkey,
+                DROP CONSTRAINT {table}_invoice_id_fkey,
+                ADD CONSTRAINT {table}_quotation_id_fkey
+                    FOREIGN KEY (quotation_id) REFERENCES quotations (id) NOT VALID,
+                ADD CONSTRAINT {table}_invoice_id_fkey
+                    FOREIGN KEY (invoice_id) REFERENCES invoices (id) NOT VALID
+        """)
 
     # Step 3: Drop indexes
     op.drop_index('ix_email_history_document_number', 'email_history')
@@ -39,30 +39,53 @@ def upgrade():
     # Create unique constraint on trigger_event
     op.create_unique_constraint('uq_automation_templates_trigger_event', 'automation_templates', ['trigger_event'])
 
-    # Insert default templates
-    op.execute("""
-        INSERT INTO automation_templates (trigger_type, trigger_event, subject, body, is_enabled)
-        VALUES
-        ('status_change', 'quotation_accepted', 'Quotation {{quotation_number}} Accepted',
-         '<html><body><p>Dear {{contact_name}},</p><p>Thank you for accepting our quotation {{quotation_number}}.</p><p>We will process your order and keep you updated on the progress.</p><p>If you have any questions, please don''t hesitate to contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
-         true),
-
-        ('status_change', 'quotation_rejected', 'Quotation {{quotation_number}} Status Update',
-         '<html><body><p>Dear {{contact_name}},</p><p>We received your response regarding quotation {{quotation_number}}.</p><p>We appreciate you taking the time to review our proposal. If you would like to discuss any modifications or have questions about our services, please feel free to reach out.</p><p>We look forward to potentially working with you in the future.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
-         true),
-
-        ('status_change', 'invoice_paid', 'Payment Received - Invoice {{invoice_number}}',
-         '<html><body><p>Dear {{contact_name}},</p><p>Thank you for your payment on invoice {{invoice_number}}.</p><p>We have received your payment and your invoice has been marked as paid.</p><p>If you need a receipt or have any questions, please contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
-         true),
-
-        ('deadline', 'quotation_deadline', 'Reminder: Quotation {{quotation_number}} Expires Soon',
-         '<html><body><p>Dear {{contact_name}},</p><p>This is a friendly reminder that quotation {{quotation_number}} will expire on {{due_date}}.</p><p>If you would like to proceed with this quotation, please let us know before the expiration date.</p><p>If you have any questions or need more time, please contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
-         true),
-
-        ('deadline', 'invoice_deadline', 'Payment Reminder - Invoice {{invoice_number}} Due Soon',
-         '<html><body><p>Dear {{contact_name}},</p><p>This is a friendly reminder that invoice {{invoice_number}} is due on {{due_date}}.</p><p>If you have already made the payment, please disregard this message.</p><p>If you have any questions about the invoice, please don''t hesitate to contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
-         true)
-    """)
+    # Insert default templates as bound parameters (executemany) rather than
+    # one big SQL literal, so the HTML bodies need no SQL escaping
+    automation_templates = sa.table(
+        'automation_templates',
+        sa.column('trigger_type', sa.String),
+        sa.column('trigger_event', sa.String),
+        sa.column('subject', sa.String),
+        sa.column('body', sa.Text),
+        sa.column('is_enabled', sa.Boolean),
+    )
+    op.bulk_insert(automation_templates, [
+        {
+            'trigger_type': 'status_change',
+            'trigger_event': 'quotation_accepted',
+            'subject': 'Quotation {{quotation_number}} Accepted',
+            'body': "<html><body><p>Dear {{contact_name}},</p><p>Thank you for accepting our quotation {{quotation_number}}.</p><p>We will process your order and keep you updated on the progress.</p><p>If you have any questions, please don't hesitate to contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>",
+            'is_enabled': True,
+        },
+        {
+            'trigger_type': 'status_change',
+            'trigger_event': 'quotation_rejected',
+            'subject': 'Quotation {{quotation_number}} Status Update',
+            'body': '<html><body><p>Dear {{contact_name}},</p><p>We received your response regarding quotation {{quotation_number}}.</p><p>We appreciate you taking the time to review our proposal. If you would like to discuss any modifications or have questions about our services, please feel free to reach out.</p><p>We look forward to potentially working with you in the future.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
+            'is_enabled': True,
+        },
+        {
+            'trigger_type': 'status_change',
+            'trigger_event': 'invoice_paid',
+            'subject': 'Payment Received - Invoice {{invoice_number}}',
+            'body': '<html><body><p>Dear {{contact_name}},</p><p>Thank you for your payment on invoice {{invoice_number}}.</p><p>We have received your payment and your invoice has been marked as paid.</p><p>If you need a receipt or have any questions, please contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
+            'is_enabled': True,
+        },
+        {
+            'trigger_type': 'deadline',
+            'trigger_event': 'quotation_deadline',
+            'subject': 'Reminder: Quotation {{quotation_number}} Expires Soon',
+            'body': '<html><body><p>Dear {{contact_name}},</p><p>This is a friendly reminder that quotation {{quotation_number}} will expire on {{due_date}}.</p><p>If you would like to proceed with this quotation, please let us know before the expiration date.</p><p>If you have any questions or need more time, please contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>',
+            'is_enabled': True,
+        },
+        {
+            'trigger_type': 'deadline',
+            'trigger_event': 'invoice_deadline',
+            'subject': 'Payment Reminder - Invoice {{invoice_number}} Due Soon',
+            'body': "<html><body><p>Dear {{contact_name}},</p><p>This is a friendly reminder that invoice {{invoice_number}} is due on {{due_date}}.</p><p>If you have already made the payment, please disregard this message.</p><p>If you have any questions about the invoice, please don't hesitate to contact us.</p><p>Best regards,<br>{{company_name}}</p></body></html>",
+            'is_enabled': True,
+        },
+    ])
 
 
 def downgrade():
@@ -16,14 +16,10 @@ depends_on = None
 
 
 def upgrade():
-    # Add company fields to users table
-    op.add_column('users', sa.Column('company_name', sa.String(length=200), nullable=True))
-    op.add_column('users', sa.Column('company_email', sa.String(length=100), nullable=True))
-    op.add_column('users', sa.Column('company_phone', sa.String(length=50), nullable=True))
+    # No-op: these users columns were moved to company_settings by the next
+    # revision (0017), so adding them here only to drop them again is skipped
+    pass
 
 
 def downgrade():
-    # Drop company fields from users table
-    op.drop_column('users', 'company_phone')
-    op.drop_column('users', 'company_email')
-    op.drop_column('users', 'company_name')
+    pass
@@ -17,10 +17,14 @@ depends_on = None
 
 
 def upgrade():
-    # Remove company fields from users table (they were just added, now moving to company_settings)
-    op.drop_column('users', 'company_phone')
-    op.drop_column('users', 'company_email')
-    op.drop_column('users', 'company_name')
+    # 0016 no longer adds company fields to users; drop them only where an
+    # earlier version of 0016 already ran
+    op.execute("""
+        ALTER TABLE users
+            DROP COLUMN IF EXISTS company_phone,
+            DROP COLUMN IF EXISTS company_email,
+            DROP COLUMN IF EXISTS company_name
+    """)
 
     # Create company_settings table
     op.create_table(
@@ -50,8 +54,3 @@ def downgrade():
     # Drop company_settings table
     op.drop_index('ix_company_settings_id', 'company_settings')
     op.drop_table('company_settings')
-
-    # Re-add company fields to users table
-    op.add_column('users', sa.Column('company_name', sa.String(length=200), nullable=True))
-    op.add_column('users', sa.Column('company_email', sa.String(length=100), nullable=True))
-    op.add_column('users', sa.Column('company_phone', sa.String(length=50), nullable=True))
@@ -17,8 +17,9 @@ depends_on = None
 
 
 def upgrade():
-    # Add attach_document column to scheduled_emails table
-    op.add_column('scheduled_emails', sa.Column('attach_document', sa.Boolean(), nullable=True, server_default='false'))
+    # Add attach_document column to scheduled_emails table. NOT NULL with a
+    # constant default is metadata-only on Postgres 11+ (no table rewrite)
+    op.add_column('scheduled_emails', sa.Column('attach_document', sa.Boolean(), nullable=False, server_default=sa.text('false')))
 
 
 def downgrade():
@@ -0,0 +1,33 @@
+"""Add covering index for user lookups by email
+
+Revision ID: 0021_users_email_covering
+Revises: 0020_attach_document
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0021_users_email_covering'
+down_revision = '0020_attach_document'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # get_current_user reads only id/name/email/role_id by email; INCLUDE lets
+    # Postgres answer it from the index without visiting the heap.
+    # Built CONCURRENTLY so logins are not blocked while it builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_covering', 'users', ['email'],
+            postgresql_include=['id', 'name', 'role_id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_covering', table_name='users', postgresql_concurrently=True)
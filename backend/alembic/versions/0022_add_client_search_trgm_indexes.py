@@ -0,0 +1,49 @@
+"""Add pg_trgm indexes for client search
+
+Revision ID: 0022_client_search_trgm
+Revises: 0021_users_email_covering
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migration_utils import index_build_settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0022_client_search_trgm'
+down_revision = '0021_users_email_covering'
+branch_labels = None
+depends_on = None
+
+
+TRGM_COLUMNS = ('company_name', 'uen', 'industry')
+
+
+def upgrade():
+    # Trusted extension on Postgres 13+, so the app role can create it
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # list_clients searches with ILIKE '%term%', which a B-tree cannot serve;
+    # trigram GIN indexes can. Built CONCURRENTLY so client writes continue
+    with op.get_context().autocommit_block(), index_build_settings():
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_clients_{column}_trgm', 'clients', [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+        # The contacts search casts the JSONB to text; index that same expression
+        op.execute("""
+            CREATE INDEX CONCURRENTLY ix_clients_contacts_text_trgm
+            ON clients USING gin ((contacts::text) gin_trgm_ops)
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_clients_contacts_text_trgm', table_name='clients', postgresql_concurrently=True)
+        for column in TRGM_COLUMNS:
+            op.drop_index(f'ix_clients_{column}_trgm', table_name='clients', postgresql_concurrently=True)
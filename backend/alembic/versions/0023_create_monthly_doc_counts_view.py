@@ -0,0 +1,39 @@
+"""Create mv_monthly_doc_counts for the dashboard trends
+
+Revision ID: 0023_monthly_doc_counts
+Revises: 0022_client_search_trgm
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0023_monthly_doc_counts'
+down_revision = '0022_client_search_trgm'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Monthly quotation/invoice counts for the dashboard trend chart, so the
+    # dashboard reads a few rows instead of grouping both tables on every hit.
+    # Refreshed by app.background_jobs
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_monthly_doc_counts AS
+        SELECT 'quotation' AS kind, to_char(created_at, 'YYYY-MM') AS month, count(*) AS count
+        FROM quotations
+        GROUP BY 2
+        UNION ALL
+        SELECT 'invoice' AS kind, to_char(created_at, 'YYYY-MM') AS month, count(*) AS count
+        FROM invoices
+        GROUP BY 2
+    """)
+
+    # REFRESH ... CONCURRENTLY needs a unique index on the view
+    op.create_index('ix_mv_monthly_doc_counts_kind_month', 'mv_monthly_doc_counts', ['kind', 'month'], unique=True)
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW mv_monthly_doc_counts")
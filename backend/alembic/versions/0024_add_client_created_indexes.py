@@ -0,0 +1,61 @@
+"""Add newest-first indexes for the dashboard's recent documents and client listings
+
+Revision ID: 0024_client_created_indexes
+Revises: 0023_monthly_doc_counts
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0024_client_created_indexes'
+down_revision = '0023_monthly_doc_counts'
+branch_labels = None
+depends_on = None
+
+
+# (table, timestamp column, new DESC index, plain index it replaces); the
+# invoices one also carries id DESC, the tiebreak of list_invoices' keyset
+RECENT_INDEXES = (
+    ('quotations', 'created_at', 'ix_quotations_created_desc', 'ix_quotations_created_at'),
+    ('invoices', 'created_at', 'ix_invoices_created_desc', 'ix_invoices_created_at'),
+    ('email_history', 'sent_at', 'ix_email_history_sent_desc', 'ix_email_history_sent_at'),
+)
+TIEBREAK_COLUMNS = {'invoices': [sa.text('id DESC')]}
+
+CLIENT_TABLES = ('quotations', 'invoices')
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        # The dashboard's recent lists (ORDER BY created_at / sent_at DESC
+        # LIMIT 5) read the first entries of these. Each replaces the plain
+        # single-column index on the same column: a B-tree leading with that
+        # column serves both scan directions, so keeping both would only
+        # double the writes
+        for table, column, name, replaced in RECENT_INDEXES:
+            op.create_index(
+                name, table, [sa.text(f'{column} DESC')] + TIEBREAK_COLUMNS.get(table, []),
+                postgresql_concurrently=True,
+            )
+            op.drop_index(replaced, table_name=table, postgresql_concurrently=True)
+
+        # A client's documents, newest first (list filtered by client_id,
+        # ORDER BY created_at DESC). The single-column client_id indexes stay
+        # for the FK check on client deletes and the other client_id lookups
+        for table in CLIENT_TABLES:
+            op.create_index(
+                f'ix_{table}_client_created', table, ['client_id', 'created_at'],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in CLIENT_TABLES:
+            op.drop_index(f'ix_{table}_client_created', table_name=table, postgresql_concurrently=True)
+        for table, column, name, replaced in RECENT_INDEXES:
+            op.create_index(replaced, table, [column], postgresql_concurrently=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
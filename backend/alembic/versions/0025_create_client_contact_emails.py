@@ -0,0 +1,43 @@
+"""Create client_contact_emails side table
+
+Revision ID: 0025_client_contact_emails
+Revises: 0024_client_created_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0025_client_contact_emails'
+down_revision = '0024_client_created_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'client_contact_emails',
+        sa.Column('email', sa.String(length=255), primary_key=True),
+        sa.Column('client_id', sa.Integer(), sa.ForeignKey('clients.id', ondelete='CASCADE'), nullable=False),
+    )
+    op.create_index('ix_client_contact_emails_client_id', 'client_contact_emails', ['client_id'])
+
+    # Backfill from clients.contacts, lowercased like the API stores them;
+    # should an email already be shared (in any case), the oldest client keeps it
+    op.execute("""
+        INSERT INTO client_contact_emails (email, client_id)
+        SELECT DISTINCT ON (email) email, client_id
+        FROM (
+            SELECT lower(contact->>'email') AS email, clients.id AS client_id
+            FROM clients, jsonb_array_elements(clients.contacts) AS contact
+        ) AS contact_emails
+        WHERE email IS NOT NULL
+        ORDER BY email, client_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_client_contact_emails_client_id', table_name='client_contact_emails')
+    op.drop_table('client_contact_emails')
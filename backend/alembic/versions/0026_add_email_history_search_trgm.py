@@ -0,0 +1,41 @@
+"""Add pg_trgm indexes for email history search
+
+Revision ID: 0026_email_history_search_trgm
+Revises: 0025_client_contact_emails
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migration_utils import index_build_settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0026_email_history_search_trgm'
+down_revision = '0025_client_contact_emails'
+branch_labels = None
+depends_on = None
+
+
+TRGM_COLUMNS = ('recipient_email', 'subject')
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # list_email_history searches recipient_email and subject with
+    # ILIKE '%term%'; trigram GIN indexes serve both sides of the OR
+    with op.get_context().autocommit_block(), index_build_settings():
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_email_history_{column}_trgm', 'email_history', [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.drop_index(f'ix_email_history_{column}_trgm', table_name='email_history', postgresql_concurrently=True)
@@ -0,0 +1,63 @@
+"""Add composite indexes for the email history, scheduled email and notification listings
+
+Revision ID: 0027_email_listing_indexes
+Revises: 0026_email_history_search_trgm
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0027_email_listing_indexes'
+down_revision = '0026_email_history_search_trgm'
+branch_labels = None
+depends_on = None
+
+
+# (index, table, columns, partial predicate, index it supersedes)
+INDEXES = (
+    ('ix_email_history_status_sent', 'email_history',
+     ['status', sa.text('sent_at DESC')], None, 'ix_email_history_status'),
+    ('ix_email_history_quotation_sent', 'email_history',
+     ['quotation_id', sa.text('sent_at DESC')], "quotation_id IS NOT NULL", 'ix_email_history_quotation_id'),
+    ('ix_email_history_invoice_sent', 'email_history',
+     ['invoice_id', sa.text('sent_at DESC')], "invoice_id IS NOT NULL", 'ix_email_history_invoice_id'),
+    ('ix_email_history_document_type_sent', 'email_history',
+     ['document_type', sa.text('sent_at DESC')], None, None),
+    ('ix_scheduled_emails_status_scheduled', 'scheduled_emails',
+     ['status', sa.text('scheduled_time DESC')], None, None),
+    ('ix_scheduled_emails_trigger_scheduled', 'scheduled_emails',
+     ['trigger_type', sa.text('scheduled_time DESC')], None, 'ix_scheduled_emails_trigger_type'),
+    ('ix_notifications_user_read_created', 'notifications',
+     ['user_id', 'is_read', sa.text('created_at DESC')], None, 'ix_notifications_user_id'),
+)
+
+
+def upgrade():
+    # Each listing filters on one column and pages in a fixed order; with the
+    # filter column leading and the sort column after it, Postgres walks the
+    # index and stops at LIMIT instead of sorting every match. The superseded
+    # single-column indexes share the leading column, so they go
+    with op.get_context().autocommit_block():
+        for name, table, columns, where, replaces in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+            if replaces:
+                op.drop_index(replaces, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where, replaces in reversed(INDEXES):
+            if replaces:
+                op.create_index(
+                    replaces, table, [columns[0]],
+                    postgresql_where=sa.text(where) if where else None,
+                    postgresql_concurrently=True,
+                )
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""Make email settings unique per user
+
+Revision ID: 0028_unique_email_settings_user
+Revises: 0027_email_listing_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0028_unique_email_settings_user'
+down_revision = '0027_email_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing duplicates would fail the unique build; stop with a clear
+    # message rather than pick which of a user's settings rows to discard.
+    # GROUP BY puts all the organization-wide (NULL) rows in one group
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT user_id FROM email_settings GROUP BY user_id HAVING count(*) > 1"
+    )).scalars().all()
+    if duplicates:
+        owners = ", ".join("organization-wide" if user_id is None else f"user_id {user_id}" for user_id in duplicates)
+        raise RuntimeError(
+            f"email_settings has more than one row for: {owners}. "
+            "Delete the extra rows, then rerun this migration."
+        )
+
+    # One settings row per user, and one organization-wide row (user_id NULL,
+    # hence NULLS NOT DISTINCT, Postgres 15+). Replaces the plain user_id index
+    with op.get_context().autocommit_block():
+        try:
+            op.create_index(
+                'ix_email_settings_user_id_unique', 'email_settings', ['user_id'],
+                unique=True, postgresql_nulls_not_distinct=True,
+                postgresql_concurrently=True,
+            )
+        except Exception:
+            # A duplicate written since the check leaves the concurrent build
+            # behind as an INVALID index; drop it so the migration can rerun
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_email_settings_user_id_unique")
+            raise
+        op.drop_index('ix_email_settings_user_id', table_name='email_settings', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_email_settings_user_id', 'email_settings', ['user_id'], postgresql_concurrently=True)
+        op.drop_index('ix_email_settings_user_id_unique', table_name='email_settings', postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Add partial index on unread notifications
+
+Revision ID: 0029_notifications_unread
+Revises: 0028_unique_email_settings_user
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0029_notifications_unread'
+down_revision = '0028_unique_email_settings_user'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unread counts (polled by the UI) and mark-all-read only touch unread
+    # rows; a partial index holds just those, so it stays small as read
+    # notifications pile up
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_unread', 'notifications', ['user_id'],
+            postgresql_where=sa.text("is_read = false"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notifications_unread', table_name='notifications', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""Create invoice_counters table
+
+Revision ID: 0030_invoice_counters
+Revises: 0029_notifications_unread
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0030_invoice_counters'
+down_revision = '0029_notifications_unread'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invoice_counters',
+        sa.Column('year', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+    )
+
+    # Seed each year's counter from the legacy INV-YYYY-NNNN numbers already issued
+    op.execute("""
+        INSERT INTO invoice_counters (year, last_value)
+        SELECT CAST(split_part(invoice_number, '-', 2) AS INTEGER),
+               MAX(CAST(split_part(invoice_number, '-', 3) AS INTEGER))
+        FROM invoices
+        WHERE invoice_number ~ '^INV-[0-9]{4}-[0-9]+$'
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('invoice_counters')
@@ -0,0 +1,56 @@
+"""Add indexes for the invoice and partner listings
+
+Revision ID: 0031_invoice_partner_list_indexes
+Revises: 0030_invoice_counters
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migration_utils import index_build_settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0031_invoice_partner_list_indexes'
+down_revision = '0030_invoice_counters'
+branch_labels = None
+depends_on = None
+
+
+# (table, column) pairs searched with ILIKE '%term%'
+TRGM_COLUMNS = (
+    ('invoices', 'invoice_number'),
+    ('partners', 'company_name'),
+    ('partners', 'contact_person_name'),
+    ('partners', 'email_address'),
+    ('partners', 'phone_number'),
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block(), index_build_settings():
+        # list_invoices filters on status and pages newest first by its
+        # (created_at, id) keyset
+        op.create_index(
+            'ix_invoices_status_created', 'invoices', ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+
+        # Invoice number search (the client side already has
+        # ix_clients_company_name_trgm) and the four-column partner search
+        for table, column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_{table}_{column}_trgm', table, [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, column in reversed(TRGM_COLUMNS):
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table, postgresql_concurrently=True)
+        op.drop_index('ix_invoices_status_created', table_name='invoices', postgresql_concurrently=True)
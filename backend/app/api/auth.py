@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from typing import Optional
-from datetime import timedelta, datetime
+from typing import Optional, Tuple
+from datetime import timedelta, datetime, timezone
+import hmac
+import threading
+import time
 import jwt
 import os
+from cachetools import TTLCache
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 
 from app.db.session import get_db
-from app.models import User as UserModel, ActivityLog
+from app.models import User as UserModel, Role, ActivityLog
 from app.schemas.user import UserOut  # Assuming your user output schema is here
 
 # JWT Configuration from environment variables
@@ -18,6 +23,11 @@ if not SECRET_KEY:
     raise ValueError("JWT_SECRET_KEY environment variable is required")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "120"))
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+VERIFIED_LOGIN_CACHE_TTL_SECONDS = int(os.getenv("VERIFIED_LOGIN_CACHE_TTL_SECONDS", "60"))
+CURRENT_USER_CACHE_TTL_SECONDS = int(os.getenv("CURRENT_USER_CACHE_TTL_SECONDS", "60"))
+FAILED_LOGIN_FLUSH_SIZE = int(os.getenv("FAILED_LOGIN_FLUSH_SIZE", "50"))
+FAILED_LOGIN_FLUSH_SECONDS = float(os.getenv("FAILED_LOGIN_FLUSH_SECONDS", "5"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -34,7 +44,16 @@ class ChangePasswordRequest(BaseModel):
     new_password: str
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id for new hashes; existing bcrypt hashes still verify and are
+# upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -46,19 +65,60 @@ def get_user(db: Session, username: str):
     user = db.query(UserModel).filter(UserModel.email == username).first()
     return user
 
+# Recently verified (stored hash, password HMAC) pairs, so repeat logins
+# within the TTL skip the argon2/bcrypt verify. The password is keyed with
+# SECRET_KEY so the cache never holds a fast, unsalted hash of it; keying on
+# the stored hash means a password change invalidates the entry on its own.
+_verified_logins = TTLCache(maxsize=10_000, ttl=VERIFIED_LOGIN_CACHE_TTL_SECONDS)
+_verified_logins_lock = threading.Lock()
+
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user(db, username)
-    if not user or not verify_password(password, user.password):
+    if not user:
         return None
+
+    key = (user.password, hmac.new(SECRET_KEY.encode(), password.encode(), 'sha256').digest())
+    with _verified_logins_lock:
+        if key in _verified_logins:
+            return user
+
+    valid, new_hash = pwd_context.verify_and_update(password, user.password)
+    if not valid:
+        return None
+    if new_hash:
+        # persisted by the caller's commit
+        user.password = new_hash
+        key = (new_hash, key[1])
+
+    with _verified_logins_lock:
+        _verified_logins[key] = True
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # Integer epoch exp: PyJWT takes it as-is, no datetime round-trip
+    expires_seconds = int(expires_delta.total_seconds()) if expires_delta else 900
+    return jwt.encode({**data, "exp": int(time.time()) + expires_seconds}, SECRET_KEY, algorithm=ALGORITHM)
+
+# Resolved (user, role name) pairs by token, so authenticated requests within
+# the TTL skip both the signature check and the users lookup. Keyed on the whole token (only
+# tokens that passed jwt.decode are stored) and the token's exp is checked on
+# every hit.
+_current_user_cache = TTLCache(maxsize=50_000, ttl=CURRENT_USER_CACHE_TTL_SECONDS)
+_current_user_cache_lock = threading.Lock()
+
+def get_current_user_and_role(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Tuple[UserOut, Optional[str]]:
+    """Resolve the token to the user and their role name in one query.
+
+    FastAPI runs this once per request, so get_current_user and the RBAC
+    dependencies built on it share the lookup.
+    """
+    with _current_user_cache_lock:
+        cached = _current_user_cache.get(token)
+    if cached is not None:
+        exp, user, role_name = cached
+        if exp is None or exp > time.time():
+            return user, role_name
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserOut:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -67,16 +127,87 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except jwt.PyJWTError:
         raise HTTPException(status_code=400, detail="Invalid authentication credentials")
 
-    user = db.query(UserModel).filter(UserModel.email == email).first()
-    if user is None:
+    row = db.execute(
+        select(UserModel.id, UserModel.name, UserModel.email, UserModel.role_id, Role.name.label("role_name"))
+        .outerjoin(Role, Role.id == UserModel.role_id)
+        .where(UserModel.email == email)
+    ).first()
+    if row is None:
         raise HTTPException(status_code=400, detail="Invalid authentication credentials")
 
-    return UserOut(
-        id=user.id,
-        name=user.name,
-        email=user.email,
-        role_id=user.role_id
+    user = UserOut(
+        id=row.id,
+        name=row.name,
+        email=row.email,
+        role_id=row.role_id
     )
+    with _current_user_cache_lock:
+        _current_user_cache[token] = (payload.get("exp"), user, row.role_name)
+    return user, row.role_name
+
+def invalidate_current_user_cache(user_id: Optional[int] = None):
+    """Drop cached token lookups for one user, or for everyone when user_id is None.
+
+    Call after changing a user's email, role or existence, or renaming or
+    deleting a role, so RBAC checks don't run on a stale role name.
+    """
+    with _current_user_cache_lock:
+        if user_id is None:
+            _current_user_cache.clear()
+            return
+        stale = [token for token, (_, user, _) in _current_user_cache.items() if user.id == user_id]
+        for token in stale:
+            _current_user_cache.pop(token, None)
+
+# async: no I/O here, so FastAPI calls it inline instead of via the threadpool
+async def get_current_user(current: Tuple[UserOut, Optional[str]] = Depends(get_current_user_and_role)) -> UserOut:
+    return current[0]
+
+# Failed-login activity rows waiting to be written. A burst of bad logins is
+# written in one batch rather than one commit per attempt; a successful login
+# also takes whatever is pending along with its own commit, and a background
+# job flushes the rest (see app.background_jobs).
+_failed_login_buffer: list = []
+_failed_login_last_flush = time.monotonic()
+_failed_login_lock = threading.Lock()
+
+def _take_failed_logins(force: bool = False) -> list:
+    global _failed_login_last_flush
+    with _failed_login_lock:
+        due = (
+            len(_failed_login_buffer) >= FAILED_LOGIN_FLUSH_SIZE
+            or time.monotonic() - _failed_login_last_flush >= FAILED_LOGIN_FLUSH_SECONDS
+        )
+        if not _failed_login_buffer or not (force or due):
+            return []
+        rows = _failed_login_buffer[:]
+        _failed_login_buffer.clear()
+        _failed_login_last_flush = time.monotonic()
+    return rows
+
+def _record_failed_login(db: Session):
+    with _failed_login_lock:
+        _failed_login_buffer.append({
+            "action": "auth.login_failure",
+            "actor_user_id": None,
+            "target_type": "user",
+            "target_id": None,
+            "message": "Login failed",
+            "log_metadata": None,
+            "created_at": datetime.now(timezone.utc),
+        })
+    rows = _take_failed_logins()
+    if rows:
+        db.execute(ActivityLog.__table__.insert(), rows)
+        db.commit()
+
+def flush_failed_logins(db: Session) -> int:
+    """Write any buffered failed-login rows now; returns how many were written."""
+    rows = _take_failed_logins(force=True)
+    if rows:
+        db.execute(ActivityLog.__table__.insert(), rows)
+        db.commit()
+    return len(rows)
 
 
 @auth_router.post("/token", response_model=Token)
@@ -87,23 +218,14 @@ def login_for_access_token(
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         # log login failure (no ip/user_agent as requested)
-        db.add(ActivityLog(
-            action="auth.login_failure",
-            actor_user_id=None,
-            target_type="user",
-            target_id=user.id if user else None,
-            message="Login failed",
-            log_metadata=None,
-        ))
-        db.commit()
+        _record_failed_login(db)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     # log login success
     db.add(ActivityLog(
@@ -114,6 +236,9 @@ def login_for_access_token(
         message="User logged in",
         log_metadata=None,
     ))
+    pending_failures = _take_failed_logins(force=True)
+    if pending_failures:
+        db.execute(ActivityLog.__table__.insert(), pending_failures)
     db.commit()
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -144,9 +269,8 @@ def change_password(payload: ChangePasswordRequest, current_user: UserOut = Depe
         db.commit()
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
-    # Update to new hashed password
+    # Update to new hashed password; committed together with the log below
     user.password = hash_password(payload.new_password)
-    db.commit()
 
     # log success
     db.add(ActivityLog(
@@ -3,30 +3,56 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import json
-from sqlalchemy import cast, Text
+from sqlalchemy import cast, Text, or_, bindparam, update, delete
+from sqlalchemy.exc import IntegrityError
 
 from app.db.session import get_db
-from app.models import Client, User, Role, ActivityLog
+from app.models import Client, ClientContactEmail, ActivityLog
 from app.schemas import ClientCreate, ClientUpdate, ClientOut, UserOut
 from app.api.auth import get_current_user
+from app.api.deps import require_admin_or_superadmin
 
 class PaginatedClientsResponse(BaseModel):
     clients: List[ClientOut]
-    total: int
+    total: Optional[int]  # None for cursor requests, which skip the count
     page: int
     per_page: int
+    next_cursor: Optional[int] = None
 
 router = APIRouter(prefix="/clients", tags=["clients"]) 
 
-# Reuse RBAC dependency like in users.py
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not role or role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
+def find_existing_contact_email(db: Session, emails: List[str], exclude_client_id: Optional[int] = None) -> Optional[str]:
+    """Return the first of these emails already used by a client's contact (ignoring case), checking all of them in one query"""
+    if not emails:
+        return None
+    query = db.query(ClientContactEmail.email).filter(ClientContactEmail.email.in_([email.lower() for email in emails]))
+    if exclude_client_id is not None:
+        query = query.filter(ClientContactEmail.client_id != exclude_client_id)
+    # Report them in submission order, as submitted
+    taken = {email for email, in query}
+    return next((email for email in emails if email.lower() in taken), None)
+
+def replace_contact_emails(db: Session, client_id: int, emails: List[str]):
+    """Point client_contact_emails at this client's current contact emails, stored lowercased"""
+    db.execute(delete(ClientContactEmail).where(ClientContactEmail.client_id == client_id))
+    db.add_all([ClientContactEmail(email=email, client_id=client_id) for email in dict.fromkeys(email.lower() for email in emails)])
+
+def commit_contact_emails(db: Session):
+    """Commit, turning a contact email claimed concurrently by another client into a 400"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Contact email already exists")
+
+# Search filter built once at import; each request only binds the term, and
+# SQLAlchemy's compiled-statement cache reuses the SQL
+CLIENT_SEARCH_FILTER = or_(
+    Client.company_name.ilike(bindparam("search_term")),
+    Client.uen.ilike(bindparam("search_term")),
+    Client.industry.ilike(bindparam("search_term")),
+    cast(Client.contacts, Text).ilike(bindparam("search_term")),  # cast JSON -> text for LIKE/ILIKE (ix_clients_contacts_text_trgm)
+)
 
 @router.get("/", response_model=PaginatedClientsResponse, dependencies=[Depends(require_admin_or_superadmin)])
 def list_clients(
@@ -34,32 +60,33 @@ def list_clients(
     per_page: int = Query(default=10, ge=1, le=100),
     search: Optional[str] = Query(default=None, description="Search by company, UEN, industry, or contact info"),
     industry: Optional[str] = Query(default=None),  # NEW
+    cursor: Optional[int] = Query(default=None, description="next_cursor from the previous page; seeks by id instead of OFFSET and skips the total count"),
     db: Session = Depends(get_db)
 ):
     query = db.query(Client)
     if search:
-        term = f"%{search}%"
-        query = query.filter(
-            (Client.company_name.ilike(term)) |
-            (Client.uen.ilike(term)) |
-            (Client.industry.ilike(term)) |
-            (cast(Client.contacts, Text).ilike(term))  # cast JSON -> text for LIKE/ILIKE
-        )
+        query = query.filter(CLIENT_SEARCH_FILTER).params(search_term=f"%{search}%")
     if industry:  # NEW
         query = query.filter(Client.industry == industry)
-    total = query.count()
-    clients = query.offset(page * per_page).limit(per_page).all()
-    return PaginatedClientsResponse(clients=clients, total=total, page=page, per_page=per_page)
+    # Newest first, by id, so a page can hand back a keyset cursor; one extra
+    # row tells whether there is a next page
+    query = query.order_by(Client.id.desc())
+    if cursor is not None:
+        total = None
+        rows = query.filter(Client.id < cursor).limit(per_page + 1).all()
+    else:
+        total = query.count()
+        rows = query.offset(page * per_page).limit(per_page + 1).all()
+    clients = rows[:per_page]
+    next_cursor = clients[-1].id if len(rows) > per_page else None
+    return PaginatedClientsResponse(clients=clients, total=total, page=page, per_page=per_page, next_cursor=next_cursor)
 
 @router.post("/", response_model=ClientOut, dependencies=[Depends(require_admin_or_superadmin)])
 def create_client(client_in: ClientCreate, db: Session = Depends(get_db), current_user: UserOut = Depends(get_current_user)):
     # Check if any contact email already exists
-    for contact in client_in.contacts:
-        existing_client = db.query(Client).filter(
-            cast(Client.contacts, Text).ilike(f'%"{contact.email}"%')  # cast JSON -> text for email lookup
-        ).first()
-        if existing_client:
-            raise HTTPException(status_code=400, detail=f"Email {contact.email} already exists")
+    existing_email = find_existing_contact_email(db, [contact.email for contact in client_in.contacts])
+    if existing_email:
+        raise HTTPException(status_code=400, detail=f"Email {existing_email} already exists")
 
     # Convert contacts to dict for JSON storage
     contacts_dict = [contact.dict() for contact in client_in.contacts]
@@ -68,8 +95,8 @@ def create_client(client_in: ClientCreate, db: Session = Depends(get_db), curren
     
     client = Client(**client_data)
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    db.flush()  # assigns client.id for the log; committed together below
+    replace_contact_emails(db, client.id, [contact.email for contact in client_in.contacts])
     
     # log create
     db.add(ActivityLog(
@@ -80,7 +107,8 @@ def create_client(client_in: ClientCreate, db: Session = Depends(get_db), curren
         message=f"Client {client.company_name} created",
         log_metadata=None,
     ))
-    db.commit()
+    commit_contact_emails(db)
+    db.refresh(client)
     return client
 
 @router.get("/{client_id}", response_model=ClientOut, dependencies=[Depends(require_admin_or_superadmin)])
@@ -92,28 +120,31 @@ def read_client(client_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{client_id}", response_model=ClientOut, dependencies=[Depends(require_admin_or_superadmin)])
 def update_client(client_id: int, client_in: ClientUpdate, db: Session = Depends(get_db), current_user: UserOut = Depends(get_current_user)):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    
-    # Check if any updated contact email already exists in another client
-    if client_in.contacts:
-        for contact in client_in.contacts:
-            existing_client = db.query(Client).filter(
-                cast(Client.contacts, Text).ilike(f'%"{contact.email}"%'),
-                Client.id != client_id
-            ).first()
-            if existing_client:
-                raise HTTPException(status_code=400, detail=f"Email {contact.email} already exists")
-    
     update_data = client_in.dict(exclude_unset=True)
     if 'contacts' in update_data:
         update_data['contacts'] = [contact.dict() for contact in client_in.contacts]
+
+    # Check if any updated contact email already exists in another client,
+    # before the UPDATE so a rejected request takes no row locks and writes nothing
+    if client_in.contacts:
+        existing_email = find_existing_contact_email(
+            db, [contact.email for contact in client_in.contacts], exclude_client_id=client_id
+        )
+        if existing_email:
+            raise HTTPException(status_code=400, detail=f"Email {existing_email} already exists")
+
+    # UPDATE ... RETURNING: one round trip instead of SELECT, UPDATE and refresh
+    if update_data:
+        client = db.execute(
+            update(Client).where(Client.id == client_id).values(**update_data).returning(Client)
+        ).scalar_one_or_none()
+    else:
+        client = db.get(Client, client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
     
-    for k, v in update_data.items():
-        setattr(client, k, v)
-    db.commit()
-    db.refresh(client)
+    if 'contacts' in update_data:
+        replace_contact_emails(db, client_id, [contact.email for contact in client_in.contacts])
     
     db.add(ActivityLog(
         action="client.update",
@@ -123,8 +154,10 @@ def update_client(client_id: int, client_in: ClientUpdate, db: Session = Depends
         message=f"Client {client.company_name} updated",
         log_metadata=None,
     ))
-    db.commit()
-    return client
+    # Serialize before commit expires the instance, so no refresh query is needed
+    client_out = ClientOut.model_validate(client)
+    commit_contact_emails(db)
+    return client_out
 
 @router.delete("/{client_id}", dependencies=[Depends(require_admin_or_superadmin)])
 def delete_client(client_id: int, db: Session = Depends(get_db), current_user: UserOut = Depends(get_current_user)):
@@ -134,8 +167,9 @@ def delete_client(client_id: int, db: Session = Depends(get_db), current_user: U
     cid = client.id
     cname = client.company_name
     db.delete(client)
-    db.commit()
-    # log delete
+    # clients.id cascades in Postgres; deleted explicitly so every backend agrees
+    replace_contact_emails(db, cid, [])
+    # log delete (same transaction as the delete)
     db.add(ActivityLog(
         action="client.delete",
         actor_user_id=current_user.id,
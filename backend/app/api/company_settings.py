@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
+import os
+import threading
+from cachetools import TTLCache
 
 from ..db.session import get_db
 from ..models import CompanySettings
 from ..schemas.company import CompanySettingsUpdate, CompanySettingsOut
 from ..schemas.user import UserOut
 from .auth import get_current_user
+from .deps import require_admin_or_superadmin
 
 router = APIRouter()
 
+COMPANY_SETTINGS_CACHE_TTL_SECONDS = int(os.getenv("COMPANY_SETTINGS_CACHE_TTL_SECONDS", "30"))
 
-# Admin/Superadmin check
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Require that the current user is an admin (role_id=1) or superadmin (role_id=2)"""
-    if current_user.role_id not in [1, 2]:
-        raise HTTPException(status_code=403, detail="Admin or superadmin access required")
-    return current_user
+# The single settings row, serialized. Replaced on update in this process; the
+# TTL bounds how long other workers keep serving an older copy
+_settings_cache = TTLCache(maxsize=1, ttl=COMPANY_SETTINGS_CACHE_TTL_SECONDS)
+_settings_cache_lock = threading.Lock()
 
 
 @router.get("/", response_model=CompanySettingsOut)
@@ -25,6 +28,11 @@ def get_company_settings(
     current_user: UserOut = Depends(get_current_user)
 ):
     """Get company settings (available to all authenticated users)"""
+    with _settings_cache_lock:
+        cached = _settings_cache.get("settings")
+    if cached is not None:
+        return cached
+
     # Get the first (and only) row
     settings = db.query(CompanySettings).first()
 
@@ -35,7 +43,10 @@ def get_company_settings(
         db.commit()
         db.refresh(settings)
 
-    return settings
+    settings_out = CompanySettingsOut.model_validate(settings)
+    with _settings_cache_lock:
+        _settings_cache["settings"] = settings_out
+    return settings_out
 
 
 @router.put("/", response_model=CompanySettingsOut)
@@ -61,4 +72,7 @@ def update_company_settings(
     db.commit()
     db.refresh(settings)
 
-    return settings
+    settings_out = CompanySettingsOut.model_validate(settings)
+    with _settings_cache_lock:
+        _settings_cache["settings"] = settings_out
+    return settings_out
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, union_all, literal, table, column, text
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
+import os
+import threading
+from cachetools import TTLCache
 
 from app.db.session import get_db
 from app.models import Quotation, Invoice, Client, Partner, EmailHistory, User, Role
@@ -11,8 +15,65 @@ from app.schemas.user import UserOut
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# Monthly quotation/invoice counts, maintained by migration 0023. Refreshed
+# before the next dashboard computation after a write (see
+# invalidate_dashboard_statistics) and hourly by app.background_jobs
+monthly_doc_counts = table('mv_monthly_doc_counts', column('kind'), column('month'), column('count'))
 
-@router.get("/statistics")
+# Advisory lock key serialising refreshes of mv_monthly_doc_counts across processes
+MONTHLY_DOC_COUNTS_LOCK_KEY = 'capstone_mv_monthly_doc_counts'
+
+def _iso_timestamp(column):
+    """Format a timestamptz column as ISO 8601 in SQL, so rows carry ready strings"""
+    return func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS.USTZH:TZM').label(column.key)
+
+
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+
+# Route prefixes whose writes change what the dashboard shows; a successful
+# POST/PUT/DELETE under any of them drops the cached statistics (see main.py)
+DASHBOARD_SOURCE_PREFIXES = ("/clients", "/partners", "/quotations", "/invoices", "/emails")
+
+# Computed statistics per role, reused until the TTL runs out or a write
+# under DASHBOARD_SOURCE_PREFIXES invalidates them
+_statistics_cache = TTLCache(maxsize=16, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+_statistics_cache_lock = threading.Lock()
+
+# Set when a write may have changed the monthly counts, so the view is
+# refreshed before trends are next read; starts set because earlier processes
+# may have exited between a write and its refresh
+_monthly_doc_counts_stale = threading.Event()
+_monthly_doc_counts_stale.set()
+
+
+def invalidate_dashboard_statistics():
+    with _statistics_cache_lock:
+        _statistics_cache.clear()
+        _monthly_doc_counts_stale.set()
+
+
+def refresh_monthly_doc_counts(db: Session, wait: bool = True) -> bool:
+    """
+    Refresh mv_monthly_doc_counts under a transaction-level advisory lock, so
+    only one process refreshes it at a time. With wait=False the refresh is
+    skipped (returning False) when another process already holds the lock.
+    """
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": MONTHLY_DOC_COUNTS_LOCK_KEY})
+    else:
+        acquired = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": MONTHLY_DOC_COUNTS_LOCK_KEY}
+        ).scalar()
+        if not acquired:
+            db.rollback()
+            return False
+    db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_monthly_doc_counts"))
+    db.commit()
+    return True
+
+
+# orjson encodes the nested lists of rows several times faster than stdlib json
+@router.get("/statistics", response_class=ORJSONResponse)
 def get_dashboard_statistics(
     current_user: UserOut = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -20,102 +81,112 @@ def get_dashboard_statistics(
     """
     Get dashboard statistics including counts, status breakdowns, and recent data.
     """
-
-    # Get total counts
-    total_quotations = db.query(Quotation).count()
-    total_invoices = db.query(Invoice).count()
-    total_clients = db.query(Client).count()
-    total_partners = db.query(Partner).count()
-
-    # Get quotation status breakdown
-    quotation_status_counts = db.query(
-        Quotation.status,
-        func.count(Quotation.id).label('count')
-    ).group_by(Quotation.status).all()
-
-    quotation_by_status = {status: count for status, count in quotation_status_counts}
-
-    # Get invoice status breakdown
-    invoice_status_counts = db.query(
-        Invoice.status,
-        func.count(Invoice.id).label('count')
-    ).group_by(Invoice.status).all()
-
-    invoice_by_status = {status: count for status, count in invoice_status_counts}
+    with _statistics_cache_lock:
+        cached = _statistics_cache.get(current_user.role_id)
+    if cached is not None:
+        return cached
+
+    statistics = _compute_dashboard_statistics(db)
+    with _statistics_cache_lock:
+        _statistics_cache[current_user.role_id] = statistics
+    return statistics
+
+
+def _compute_dashboard_statistics(db: Session) -> Dict[str, Any]:
+    # Client and partner totals in one round trip
+    total_clients, total_partners = db.execute(select(
+        select(func.count(Client.id)).scalar_subquery(),
+        select(func.count(Partner.id)).scalar_subquery(),
+    )).one()
+
+    # Quotation and invoice status breakdowns in one round trip; the totals are
+    # the sums of the per-status counts
+    status_counts = db.execute(union_all(
+        select(literal('quotation').label('kind'), Quotation.status, func.count(Quotation.id))
+        .group_by(Quotation.status),
+        select(literal('invoice'), Invoice.status, func.count(Invoice.id))
+        .group_by(Invoice.status),
+    )).all()
+
+    quotation_by_status = {status: count for kind, status, count in status_counts if kind == 'quotation'}
+    invoice_by_status = {status: count for kind, status, count in status_counts if kind == 'invoice'}
+    total_quotations = sum(quotation_by_status.values())
+    total_invoices = sum(invoice_by_status.values())
 
     # Note: Invoice and Quotation models don't store total_amount
     # They only store document metadata
     total_revenue = 0.0
     pending_quotations_value = 0.0
 
-    # Get recent quotations (last 5)
-    recent_quotations = db.query(Quotation).order_by(
-        Quotation.created_at.desc()
-    ).limit(5).all()
-
-    # Get recent invoices (last 5)
-    recent_invoices = db.query(Invoice).order_by(
-        Invoice.created_at.desc()
-    ).limit(5).all()
-
-    # Get recent emails (last 5)
-    recent_emails = db.query(EmailHistory).order_by(
-        EmailHistory.sent_at.desc()
-    ).limit(5).all()
-
-    # Format recent quotations
-    formatted_quotations = []
-    for q in recent_quotations:
-        client = db.query(Client).filter(Client.id == q.client_id).first()
-        formatted_quotations.append({
-            'id': q.id,
-            'quotation_number': q.quotation_number,
-            'client_name': client.company_name if client else 'Unknown',
-            'status': q.status,
-            'created_at': q.created_at.isoformat() if q.created_at else None,
-            'due_date': q.due_date.isoformat() if q.due_date else None,
-        })
-
-    # Format recent invoices
-    formatted_invoices = []
-    for inv in recent_invoices:
-        client = db.query(Client).filter(Client.id == inv.client_id).first()
-        formatted_invoices.append({
-            'id': inv.id,
-            'invoice_number': inv.invoice_number,
-            'client_name': client.company_name if client else 'Unknown',
-            'status': inv.status,
-            'created_at': inv.created_at.isoformat() if inv.created_at else None,
-            'due_date': inv.due_date.isoformat() if inv.due_date else None,
-        })
-
-    # Format recent emails
-    formatted_emails = []
-    for email in recent_emails:
-        formatted_emails.append({
-            'id': email.id,
-            'recipient_email': email.recipient_email,
-            'subject': email.subject,
-            'status': email.status,
-            'sent_at': email.sent_at.isoformat() if email.sent_at else None,
-        })
+    # Recent lists (last 5 each): only the columns shown, with the client name
+    # joined in and timestamps already formatted, selected under their response
+    # keys so each row maps straight to its dict (no ORM instances or datetimes)
+    recent_quotations = db.execute(
+        select(
+            Quotation.id, Quotation.quotation_number,
+            func.coalesce(Client.company_name, 'Unknown').label('client_name'),
+            Quotation.status, _iso_timestamp(Quotation.created_at), _iso_timestamp(Quotation.due_date),
+        )
+        .outerjoin(Client, Client.id == Quotation.client_id)
+        .order_by(Quotation.created_at.desc())
+        .limit(5)
+    ).mappings().all()
+
+    recent_invoices = db.execute(
+        select(
+            Invoice.id, Invoice.invoice_number,
+            func.coalesce(Client.company_name, 'Unknown').label('client_name'),
+            Invoice.status, _iso_timestamp(Invoice.created_at), _iso_timestamp(Invoice.due_date),
+        )
+        .outerjoin(Client, Client.id == Invoice.client_id)
+        .order_by(Invoice.created_at.desc())
+        .limit(5)
+    ).mappings().all()
+
+    recent_emails = db.execute(
+        select(
+            EmailHistory.id, EmailHistory.recipient_email, EmailHistory.subject,
+            EmailHistory.status, _iso_timestamp(EmailHistory.sent_at),
+        )
+        .order_by(EmailHistory.sent_at.desc())
+        .limit(5)
+    ).mappings().all()
+
+    formatted_quotations = [dict(row) for row in recent_quotations]
+    formatted_invoices = [dict(row) for row in recent_invoices]
+    formatted_emails = [dict(row) for row in recent_emails]
 
     # Get monthly quotations/invoices trend (last 6 months)
     six_months_ago = datetime.now() - timedelta(days=180)
-
-    monthly_quotations = db.query(
-        func.to_char(Quotation.created_at, 'YYYY-MM').label('month'),
-        func.count(Quotation.id).label('count')
-    ).filter(
-        Quotation.created_at >= six_months_ago
-    ).group_by('month').order_by('month').all()
-
-    monthly_invoices = db.query(
-        func.to_char(Invoice.created_at, 'YYYY-MM').label('month'),
-        func.count(Invoice.id).label('count')
-    ).filter(
-        Invoice.created_at >= six_months_ago
-    ).group_by('month').order_by('month').all()
+    cutoff_month = six_months_ago.strftime('%Y-%m')
+    cutoff_month_start = six_months_ago.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    cutoff_month_end = (cutoff_month_start + timedelta(days=32)).replace(day=1)
+
+    # Bring the view up to date with any write since it was last refreshed
+    if _monthly_doc_counts_stale.is_set():
+        _monthly_doc_counts_stale.clear()
+        try:
+            refresh_monthly_doc_counts(db)
+        except Exception:
+            _monthly_doc_counts_stale.set()
+            raise
+
+    # Whole months after the cutoff's come from the view; the cutoff's own
+    # month only counts documents from the cutoff on, so the window stays
+    # exactly the last 180 days. All in one round trip
+    monthly_counts = db.execute(union_all(
+        select(monthly_doc_counts.c.kind, monthly_doc_counts.c.month, monthly_doc_counts.c.count)
+        .where(monthly_doc_counts.c.month > cutoff_month),
+        select(literal('quotation'), literal(cutoff_month), func.count(Quotation.id))
+        .where(Quotation.created_at >= six_months_ago, Quotation.created_at < cutoff_month_end)
+        .having(func.count(Quotation.id) > 0),
+        select(literal('invoice'), literal(cutoff_month), func.count(Invoice.id))
+        .where(Invoice.created_at >= six_months_ago, Invoice.created_at < cutoff_month_end)
+        .having(func.count(Invoice.id) > 0),
+    ).order_by('month')).all()
+
+    monthly_quotations = [(month, count) for kind, month, count in monthly_counts if kind == 'quotation']
+    monthly_invoices = [(month, count) for kind, month, count in monthly_counts if kind == 'invoice']
 
     return {
         'counts': {
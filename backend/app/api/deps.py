@@ -0,0 +1,18 @@
+from fastapi import Depends, HTTPException
+from typing import Optional, Tuple
+
+from app.schemas import UserOut
+from app.api.auth import get_current_user_and_role
+
+ADMIN_ROLE_NAMES = frozenset({"admin", "superadmin"})
+
+
+# RBAC dependency for admin/superadmin access, shared by the routers.
+# The role name comes joined in with the (cached) user lookup, so the check
+# runs no query; with no I/O left it is async, so FastAPI runs it inline
+# rather than in the threadpool
+async def require_admin_or_superadmin(current: Tuple[UserOut, Optional[str]] = Depends(get_current_user_and_role)):
+    current_user, role_name = current
+    if role_name not in ADMIN_ROLE_NAMES:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return current_user
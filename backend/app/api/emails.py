@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, update, or_, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, Bundle
 from typing import List, Optional
 from datetime import datetime
+import hashlib
+import os
+import threading
+from cachetools import TTLCache
 
 from app.db.session import get_db
 from app.models import (
     EmailTemplate, EmailHistory, ScheduledEmail, Notification,
-    EmailSettings, AutomationTemplate, User, Role, Quotation, Invoice
+    EmailSettings, AutomationTemplate, Quotation, Invoice
 )
 from app.schemas.email import (
     EmailTemplateCreate, EmailTemplateUpdate, EmailTemplateOut,
@@ -19,21 +26,62 @@ from app.schemas.email import (
 )
 from app.schemas import UserOut
 from app.api.auth import get_current_user
+from app.api.deps import require_admin_or_superadmin
 from app.services.email_service import EmailService
 from app.services.email_scheduler import EmailScheduler
 from app.services.notification_service import NotificationService
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
-# RBAC dependency for admin/superadmin access
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not role or role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
+TEMPLATE_CACHE_TTL_SECONDS = int(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "300"))
+
+# Serialized email template lists (by template_type filter) and automation
+# templates, loaded on every admin page. Cleared on any write through this
+# module; the TTL bounds how long other workers serve an older copy
+_template_cache = TTLCache(maxsize=32, ttl=TEMPLATE_CACHE_TTL_SECONDS)
+_template_cache_lock = threading.Lock()
+
+
+def invalidate_template_cache():
+    with _template_cache_lock:
+        _template_cache.clear()
+
+
+def paginate_with_total(query, order_by, page: int, per_page: int):
+    """Fetch one page and the total match count together (COUNT(*) OVER ()), saving the separate count query"""
+    rows = query.add_columns(func.count().over()).order_by(*order_by).offset(page * per_page).limit(per_page).all()
+    if not rows:
+        # No row to carry the count: nothing matches, or the page is past the end
+        return [], (query.count() if page else 0)
+    return [item for item, _ in rows], rows[0][1]
+
+
+def construct_out(schema, row):
+    """Build a response model from a trusted DB row without validating it field by field.
+
+    FastAPI then serializes the model straight to JSON bytes; use only where
+    the columns already match the schema's types.
+    """
+    return schema.model_construct(**{name: getattr(row, name) for name in schema.model_fields})
+
+
+# Exactly the columns EmailHistoryOut returns, for the history listing
+EMAIL_HISTORY_OUT_COLUMNS = Bundle(
+    "email_history", *[getattr(EmailHistory, name) for name in EmailHistoryOut.model_fields]
+)
+
+
+# Search filters built once at import; each request only binds the term, and
+# SQLAlchemy's compiled-statement cache reuses the SQL
+EMAIL_HISTORY_SEARCH_FILTER = or_(
+    EmailHistory.recipient_email.ilike(bindparam("search_term")),
+    EmailHistory.subject.ilike(bindparam("search_term")),
+)
+SCHEDULED_EMAIL_SEARCH_FILTER = or_(
+    ScheduledEmail.recipient_email.ilike(bindparam("search_term")),
+    ScheduledEmail.subject.ilike(bindparam("search_term")),
+    ScheduledEmail.document_number.ilike(bindparam("search_term")),
+)
 
 
 # ==================== EMAIL TEMPLATES ====================
@@ -45,12 +93,23 @@ def list_email_templates(
     db: Session = Depends(get_db)
 ):
     """List all email templates"""
+    cache_key = ("email_templates", template_type or None)
+    with _template_cache_lock:
+        cached = _template_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     query = db.query(EmailTemplate)
 
     if template_type:
         query = query.filter(EmailTemplate.template_type == template_type)
 
-    templates = query.order_by(EmailTemplate.created_at.desc()).all()
+    templates = [
+        EmailTemplateOut.model_validate(template)
+        for template in query.order_by(EmailTemplate.created_at.desc()).all()
+    ]
+    with _template_cache_lock:
+        _template_cache[cache_key] = templates
     return templates
 
 
@@ -79,9 +138,13 @@ def create_email_template(
         created_by=current_user.id
     )
     db.add(template)
+    # eager_defaults: the INSERT returns id and timestamps, so serialize now
+    # rather than refresh after the commit expires the instance
+    db.flush()
+    template_out = EmailTemplateOut.model_validate(template)
     db.commit()
-    db.refresh(template)
-    return template
+    invalidate_template_cache()
+    return template_out
 
 
 @router.put("/templates/{template_id}", response_model=EmailTemplateOut)
@@ -102,6 +165,7 @@ def update_email_template(
         setattr(template, field, value)
 
     db.commit()
+    invalidate_template_cache()
     db.refresh(template)
     return template
 
@@ -119,6 +183,7 @@ def delete_email_template(
 
     db.delete(template)
     db.commit()
+    invalidate_template_cache()
     return {"message": "Email template deleted successfully"}
 
 
@@ -182,7 +247,9 @@ def list_email_history(
     db: Session = Depends(get_db)
 ):
     """List email history with pagination and filters"""
-    query = db.query(EmailHistory)
+    # Plain column rows (bundled so the page helper sees one item per row): no
+    # ORM instances, identity map or attribute instrumentation for the page
+    query = db.query(EMAIL_HISTORY_OUT_COLUMNS)
 
     if status:
         query = query.filter(EmailHistory.status == status)
@@ -195,19 +262,15 @@ def list_email_history(
 
     if search:
         # Search by recipient email or subject
-        query = query.filter(
-            (EmailHistory.recipient_email.ilike(f"%{search}%")) |
-            (EmailHistory.subject.ilike(f"%{search}%"))
-        )
+        query = query.filter(EMAIL_HISTORY_SEARCH_FILTER).params(search_term=f"%{search}%")
 
     if document_type:
         query = query.filter(EmailHistory.document_type == document_type)
 
-    total = query.count()
-    emails = query.order_by(EmailHistory.sent_at.desc()).offset(page * per_page).limit(per_page).all()
+    emails, total = paginate_with_total(query, [EmailHistory.sent_at.desc()], page, per_page)
 
-    return PaginatedEmailHistoryResponse(
-        emails=emails,
+    return PaginatedEmailHistoryResponse.model_construct(
+        emails=[construct_out(EmailHistoryOut, email) for email in emails],
         total=total,
         page=page,
         per_page=per_page
@@ -262,14 +325,9 @@ def list_scheduled_emails(
 
     if search:
         # Search by recipient email, subject, or document number
-        query = query.filter(
-            (ScheduledEmail.recipient_email.ilike(f"%{search}%")) |
-            (ScheduledEmail.subject.ilike(f"%{search}%")) |
-            (ScheduledEmail.document_number.ilike(f"%{search}%"))
-        )
+        query = query.filter(SCHEDULED_EMAIL_SEARCH_FILTER).params(search_term=f"%{search}%")
 
-    total = query.count()
-    scheduled_emails = query.order_by(ScheduledEmail.scheduled_time.desc()).offset(page * per_page).limit(per_page).all()
+    scheduled_emails, total = paginate_with_total(query, [ScheduledEmail.scheduled_time.desc()], page, per_page)
 
     return PaginatedScheduledEmailsResponse(
         scheduled_emails=scheduled_emails,
@@ -292,6 +350,19 @@ def get_scheduled_email(
     return scheduled_email
 
 
+# Stored in JSON columns, so nested datetimes (recurrence end_date) must be ISO strings
+SCHEDULED_EMAIL_JSON_FIELDS = {'recurrence_pattern', 'trigger_config'}
+
+
+def dump_scheduled_email(scheduled_email_in, exclude_unset: bool = False) -> dict:
+    """Column values for a scheduled email; timestamp columns stay datetime objects for the driver"""
+    data = scheduled_email_in.model_dump(exclude_unset=exclude_unset)
+    data.update(scheduled_email_in.model_dump(
+        mode='json', exclude_unset=exclude_unset, include=SCHEDULED_EMAIL_JSON_FIELDS
+    ))
+    return data
+
+
 @router.post("/scheduled", response_model=ScheduledEmailOut)
 def create_scheduled_email(
     scheduled_email_in: ScheduledEmailCreate,
@@ -323,8 +394,7 @@ def create_scheduled_email(
         document_number = invoice.invoice_number
         document_type = 'invoice'
 
-    # Use mode='json' to automatically convert datetime to ISO strings
-    data = scheduled_email_in.model_dump(mode='json')
+    data = dump_scheduled_email(scheduled_email_in)
 
     scheduled_email = ScheduledEmail(
         **data,
@@ -333,19 +403,22 @@ def create_scheduled_email(
         created_by=current_user.id
     )
     db.add(scheduled_email)
+    # eager_defaults: the INSERT returns id and timestamps, so serialize now
+    # rather than refresh after the commit expires the instance
+    db.flush()
+    scheduled_email_out = ScheduledEmailOut.model_validate(scheduled_email)
     db.commit()
-    db.refresh(scheduled_email)
 
     # Create notification
     NotificationService.create_email_scheduled_notification(
         db=db,
         user_id=current_user.id,
-        recipient_email=scheduled_email.recipient_email,
-        scheduled_time=scheduled_email.scheduled_time,
-        scheduled_email_id=scheduled_email.id
+        recipient_email=scheduled_email_out.recipient_email,
+        scheduled_time=scheduled_email_out.scheduled_time,
+        scheduled_email_id=scheduled_email_out.id
     )
 
-    return scheduled_email
+    return scheduled_email_out
 
 
 @router.put("/scheduled/{scheduled_email_id}", response_model=ScheduledEmailOut)
@@ -360,8 +433,7 @@ def update_scheduled_email(
     if not scheduled_email:
         raise HTTPException(status_code=404, detail="Scheduled email not found")
 
-    # Use mode='json' to automatically convert datetime to ISO strings
-    update_data = scheduled_email_in.model_dump(exclude_unset=True, mode='json')
+    update_data = dump_scheduled_email(scheduled_email_in, exclude_unset=True)
 
     for field, value in update_data.items():
         setattr(scheduled_email, field, value)
@@ -378,11 +450,11 @@ def cancel_scheduled_email(
     db: Session = Depends(get_db)
 ):
     """Cancel a scheduled email"""
-    scheduled_email = db.query(ScheduledEmail).filter(ScheduledEmail.id == scheduled_email_id).first()
-    if not scheduled_email:
+    result = db.execute(
+        update(ScheduledEmail).where(ScheduledEmail.id == scheduled_email_id).values(status='cancelled')
+    )
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Scheduled email not found")
-
-    scheduled_email.status = 'cancelled'
     db.commit()
     return {"message": "Scheduled email cancelled successfully"}
 
@@ -391,6 +463,8 @@ def cancel_scheduled_email(
 
 @router.get("/notifications", response_model=PaginatedNotificationsResponse)
 def list_notifications(
+    request: Request,
+    response: Response,
     page: int = Query(default=0, ge=0),
     per_page: int = Query(default=10, ge=1, le=100),
     is_read: Optional[bool] = Query(default=None),
@@ -398,22 +472,41 @@ def list_notifications(
     db: Session = Depends(get_db)
 ):
     """List notifications for current user"""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    # The UI polls this; an unchanged list answers 304 after one aggregate
+    # query instead of the page query and serialization
+    version = NotificationService.get_version(db, current_user.id)
+    etag = 'W/"%s"' % hashlib.sha1(repr((current_user.id, version, page, per_page, is_read)).encode()).hexdigest()
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+
+    user_notifications = db.query(Notification).filter(Notification.user_id == current_user.id)
+    query = user_notifications
 
     if is_read is not None:
         query = query.filter(Notification.is_read == is_read)
 
-    total = query.count()
-    unread_count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
-
-    # Sort: unread first (is_read=False), then by newest (created_at DESC)
-    notifications = query.order_by(Notification.is_read.asc(), Notification.created_at.desc()).offset(page * per_page).limit(per_page).all()
+    # Sort: unread first (is_read=False), then by newest (created_at DESC).
+    # The total and unread counts ride along on every row as window aggregates
+    rows = query.add_columns(
+        func.count().over(),
+        func.count().filter(Notification.is_read == False).over(),
+    ).order_by(
+        Notification.is_read.asc(), Notification.created_at.desc()
+    ).offset(page * per_page).limit(per_page).all()
+
+    notifications = [notification for notification, _, _ in rows]
+    if rows:
+        total, unread_count = rows[0][1], rows[0][2]
+    else:
+        total, unread_count = (query.count() if page else 0), None
+    # Read-only listings filter the unread rows out of the window
+    if unread_count is None or is_read is True:
+        unread_count = NotificationService.get_unread_count(db, current_user.id)
 
-    return PaginatedNotificationsResponse(
-        notifications=notifications,
+    return PaginatedNotificationsResponse.model_construct(
+        notifications=[construct_out(NotificationOut, notification) for notification in notifications],
         total=total,
         page=page,
         per_page=per_page,
@@ -481,6 +574,19 @@ def get_email_settings(
     return settings
 
 
+EMAIL_SETTINGS_USER_INDEX = 'ix_email_settings_user_id_unique'
+
+
+def is_duplicate_email_settings(error: IntegrityError) -> bool:
+    """Whether an email_settings INSERT hit the one-row-per-user index (rather than, say, the user_id foreign key)"""
+    diag = getattr(error.orig, 'diag', None)
+    if diag is not None:
+        # psycopg2 names the violated index
+        return diag.constraint_name == EMAIL_SETTINGS_USER_INDEX
+    # SQLite (tests) only names the columns
+    return 'UNIQUE constraint failed: email_settings.user_id' in str(error.orig)
+
+
 @router.post("/settings", response_model=EmailSettingsOut)
 def create_email_settings(
     settings_in: EmailSettingsCreate,
@@ -488,19 +594,21 @@ def create_email_settings(
     db: Session = Depends(get_db)
 ):
     """Create email settings"""
-    # Check if settings already exist for this user
-    existing = db.query(EmailSettings).filter(
-        EmailSettings.user_id == settings_in.user_id
-    ).first()
-
-    if existing:
-        raise HTTPException(status_code=400, detail="Email settings already exist for this user")
-
     settings = EmailSettings(**settings_in.model_dump())
     db.add(settings)
+    # The unique index on user_id rejects a second row for this user, so no
+    # existence check up front. eager_defaults: the INSERT returns id and
+    # timestamps, so serialize now rather than refresh after the commit
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_email_settings(e):
+            raise HTTPException(status_code=400, detail="Email settings already exist for this user")
+        raise
+    settings_out = EmailSettingsOut.model_validate(settings)
     db.commit()
-    db.refresh(settings)
-    return settings
+    return settings_out
 
 
 @router.put("/settings/{settings_id}", response_model=EmailSettingsOut)
@@ -569,10 +677,20 @@ def get_automation_templates(
     db: Session = Depends(get_db)
 ):
     """Get all automation templates"""
-    templates = db.query(AutomationTemplate).all()
+    with _template_cache_lock:
+        cached = _template_cache.get("automation_templates")
+    if cached is not None:
+        return {"templates": cached}
+
+    templates = [AutomationTemplateOut.model_validate(template) for template in db.query(AutomationTemplate).all()]
+    with _template_cache_lock:
+        _template_cache["automation_templates"] = templates
     return {"templates": templates}
 
 
+AUTOMATION_TEMPLATE_FIELDS = ('trigger_type', 'subject', 'body', 'is_enabled')
+
+
 @router.post("/automation-templates", response_model=AutomationTemplatesResponse)
 def save_automation_templates(
     request: SaveAutomationTemplatesRequest,
@@ -580,39 +698,34 @@ def save_automation_templates(
     db: Session = Depends(get_db)
 ):
     """Save or update automation templates"""
-    saved_templates = []
-
+    # One entry per trigger_event (ON CONFLICT can't touch a row twice); a
+    # repeated event is merged into the earlier one, as sequential saves would
+    templates = {}
     for template_data in request.templates:
         trigger_event = template_data.get('trigger_event')
+        templates[trigger_event] = {**templates.get(trigger_event, {}), **template_data}
+
+    # Upsert on the unique trigger_event, one INSERT ... ON CONFLICT DO UPDATE
+    # ... RETURNING per set of submitted fields (normally just one), so an
+    # existing template keeps any field the request leaves out
+    batches = {}
+    for trigger_event, template_data in templates.items():
+        fields = tuple(field for field in AUTOMATION_TEMPLATE_FIELDS if field in template_data)
+        batches.setdefault(fields, []).append(
+            {'trigger_event': trigger_event, **{field: template_data[field] for field in fields}}
+        )
 
-        # Check if template already exists
-        existing_template = db.query(AutomationTemplate).filter(
-            AutomationTemplate.trigger_event == trigger_event
-        ).first()
-
-        if existing_template:
-            # Update existing template
-            existing_template.trigger_type = template_data.get('trigger_type', existing_template.trigger_type)
-            existing_template.subject = template_data.get('subject', existing_template.subject)
-            existing_template.body = template_data.get('body', existing_template.body)
-            existing_template.is_enabled = template_data.get('is_enabled', existing_template.is_enabled)
-            saved_templates.append(existing_template)
-        else:
-            # Create new template
-            new_template = AutomationTemplate(
-                trigger_type=template_data['trigger_type'],
-                trigger_event=trigger_event,
-                subject=template_data['subject'],
-                body=template_data['body'],
-                is_enabled=template_data.get('is_enabled', True)
-            )
-            db.add(new_template)
-            saved_templates.append(new_template)
-
+    saved = {}
+    for fields, rows in batches.items():
+        stmt = pg_insert(AutomationTemplate).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AutomationTemplate.trigger_event],
+            set_={**{field: stmt.excluded[field] for field in fields}, 'updated_at': func.now()},
+        ).returning(AutomationTemplate)
+        for template in db.scalars(stmt, execution_options={"populate_existing": True}):
+            saved[template.trigger_event] = AutomationTemplateOut.model_validate(template)
+
+    # Serialized before commit expires the instances, so nothing is reloaded
     db.commit()
-
-    # Refresh all templates to get updated values
-    for template in saved_templates:
-        db.refresh(template)
-
-    return {"templates": saved_templates}
+    invalidate_template_cache()
+    return {"templates": [saved[trigger_event] for trigger_event in templates]}
@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import List, Optional
 from datetime import datetime
+import base64
 import os
+import threading
 from pathlib import Path
+from cachetools import TTLCache
 
 from app.db.session import get_db
-from app.models import Invoice, Quotation, Client, Template, User, Role, ActivityLog
+from app.models import Invoice, InvoiceCounter, Quotation, Client, Template, ActivityLog
 from app.schemas import InvoiceCreate, InvoiceUpdate, InvoiceOut, InvoiceListItem, PaginatedInvoicesResponse, UserOut
 from app.api.auth import get_current_user
+from app.api.deps import require_admin_or_superadmin
 from app.services.file_storage import file_storage
 from app.services.quotation_filler import quotation_filler  # Reuse the same filler service
 from app.services.email_scheduler import EmailScheduler
@@ -19,15 +25,21 @@ router = APIRouter(prefix="/invoices", tags=["invoices"])
 # OnlyOffice configuration from environment variables
 BACKEND_CALLBACK_URL = os.getenv("BACKEND_CALLBACK_URL", "http://host.docker.internal:8000")
 
-# RBAC dependency for admin/superadmin access
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not role or role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
+# Chunk size for streaming edited documents back from OnlyOffice
+DOCUMENT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+INVOICE_COUNT_CACHE_TTL_SECONDS = int(os.getenv("INVOICE_COUNT_CACHE_TTL_SECONDS", "15"))
+
+# list_invoices totals by filter set, so paging through one listing counts
+# once. Cleared on invoice writes in this process; the TTL bounds how long
+# other workers (and client renames, for the search filter) go unseen
+_count_cache = TTLCache(maxsize=512, ttl=INVOICE_COUNT_CACHE_TTL_SECONDS)
+_count_cache_lock = threading.Lock()
+
+
+def invalidate_invoice_counts():
+    with _count_cache_lock:
+        _count_cache.clear()
 
 
 def generate_invoice_number(db: Session, quotation: Quotation) -> str:
@@ -49,18 +61,29 @@ def generate_invoice_number(db: Session, quotation: Quotation) -> str:
         ).count()
         return f"{base}-{existing_count + 1}"
     else:
-        # Legacy fallback for old Q-YYYY-NNNN format
+        # Legacy fallback for old Q-YYYY-NNNN format; the year's counter is
+        # bumped atomically and commits (or rolls back) with the invoice
         current_year = datetime.now().year
-        prefix = f"INV-{current_year}-"
-        latest = db.query(Invoice).filter(
-            Invoice.invoice_number.like(f"{prefix}%")
-        ).order_by(Invoice.invoice_number.desc()).first()
-        if latest:
-            last_number = int(latest.invoice_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-        return f"{prefix}{new_number:04d}"
+        stmt = pg_insert(InvoiceCounter).values(year=current_year, last_value=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InvoiceCounter.year],
+            set_={'last_value': InvoiceCounter.last_value + 1},
+        ).returning(InvoiceCounter.last_value)
+        new_number = db.execute(stmt).scalar_one()
+        return f"INV-{current_year}-{new_number:04d}"
+
+
+def encode_invoice_cursor(invoice: Invoice) -> str:
+    """Opaque keyset cursor for the page after ``invoice``: its (created_at, id)"""
+    return base64.urlsafe_b64encode(f"{invoice.created_at.isoformat()}|{invoice.id}".encode()).decode()
+
+
+def decode_invoice_cursor(cursor: str):
+    try:
+        created_at, invoice_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(invoice_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("/", response_model=PaginatedInvoicesResponse)
@@ -71,6 +94,7 @@ def list_invoices(
     status: Optional[str] = Query(default=None),
     client_id: Optional[int] = Query(default=None),
     quotation_id: Optional[int] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page; seeks by (created_at, id) instead of OFFSET and skips the total count"),
     current_user: UserOut = Depends(require_admin_or_superadmin),
     db: Session = Depends(get_db)
 ):
@@ -80,10 +104,13 @@ def list_invoices(
     if search:
         term = f"%{search}%"
         # Join with Client to search by company name
-        query = query.join(Client).filter(
+        query = query.join(Client).options(contains_eager(Invoice.client)).filter(
             (Invoice.invoice_number.ilike(term)) |
             (Client.company_name.ilike(term))
         )
+    else:
+        # InvoiceListItem embeds the client; load them in one IN query
+        query = query.options(selectinload(Invoice.client))
 
     if status:
         query = query.filter(Invoice.status == status)
@@ -94,14 +121,33 @@ def list_invoices(
     if quotation_id:
         query = query.filter(Invoice.quotation_id == quotation_id)
 
-    total = query.count()
-    invoices = query.order_by(Invoice.created_at.desc()).offset(page * per_page).limit(per_page).all()
+    # Newest first by created_at, with id breaking ties, so a page can hand
+    # back a (created_at, id) keyset cursor that stays correct for back-dated
+    # or imported rows; one extra row tells whether there is a next page
+    query = query.order_by(Invoice.created_at.desc(), Invoice.id.desc())
+    if cursor is not None:
+        total = None
+        rows = query.filter(
+            tuple_(Invoice.created_at, Invoice.id) < decode_invoice_cursor(cursor)
+        ).limit(per_page + 1).all()
+    else:
+        count_key = (search, status, client_id, quotation_id)
+        with _count_cache_lock:
+            total = _count_cache.get(count_key)
+        if total is None:
+            total = query.count()
+            with _count_cache_lock:
+                _count_cache[count_key] = total
+        rows = query.offset(page * per_page).limit(per_page + 1).all()
+    invoices = rows[:per_page]
+    next_cursor = encode_invoice_cursor(invoices[-1]) if len(rows) > per_page else None
 
     return PaginatedInvoicesResponse(
         invoices=invoices,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=next_cursor
     )
 
 
@@ -145,12 +191,8 @@ def create_invoice(
     if not template.file_path or not file_storage.file_exists(template.id):
         raise HTTPException(status_code=400, detail="Template file not found")
 
-    # Generate invoice number derived from the linked quotation
-    invoice_number = generate_invoice_number(db, quotation)
-
     # Create invoice record - copy data from quotation
     invoice_data = {
-        'invoice_number': invoice_number,
         'quotation_id': quotation.id,
         'client_id': quotation.client_id,
         'selected_contact': quotation.selected_contact,
@@ -171,11 +213,8 @@ def create_invoice(
     elif quotation.due_date:
         invoice_data['due_date'] = quotation.due_date
 
-    invoice = Invoice(**invoice_data)
-    db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
-
+    # Fill the document before any write: numbering a legacy invoice locks its
+    # year's counter row until commit, so that lock should not span the fill
     try:
         # Get template content
         template_content = file_storage.get_docx_content(template.id)
@@ -190,20 +229,22 @@ def create_invoice(
         }
 
         # Parse selected_contact - handle both dict and JSON
-        if isinstance(invoice.selected_contact, dict):
-            contact_data = invoice.selected_contact
+        selected_contact = invoice_data['selected_contact']
+        if isinstance(selected_contact, dict):
+            contact_data = selected_contact
         else:
             import json
-            contact_data = json.loads(invoice.selected_contact) if isinstance(invoice.selected_contact, str) else invoice.selected_contact
+            contact_data = json.loads(selected_contact) if isinstance(selected_contact, str) else selected_contact
 
         # Prepare company data
         company_data = {}
-        if invoice.my_company_info:
-            if isinstance(invoice.my_company_info, dict):
-                company_data = invoice.my_company_info
+        my_company_info = invoice_data.get('my_company_info')
+        if my_company_info:
+            if isinstance(my_company_info, dict):
+                company_data = my_company_info
             else:
                 import json
-                company_data = json.loads(invoice.my_company_info) if isinstance(invoice.my_company_info, str) else invoice.my_company_info
+                company_data = json.loads(my_company_info) if isinstance(my_company_info, str) else my_company_info
 
         # Fill template with client data (reuse quotation filler service)
         filled_content, unfilled_placeholders = quotation_filler.fill_template_with_client_data(
@@ -212,6 +253,25 @@ def create_invoice(
             contact_data,
             company_data
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create invoice: {str(e)}")
+
+    file_path = None
+    try:
+        # Generate invoice number derived from the linked quotation
+        invoice_number = generate_invoice_number(db, quotation)
+
+        invoice = Invoice(
+            **invoice_data,
+            invoice_number=invoice_number,
+            file_name=f"{invoice_number}_{client.company_name}.docx",
+            file_size=len(filled_content),
+            unfilled_placeholders=unfilled_placeholders
+        )
+        db.add(invoice)
+        # Flushed for its id, which names the file; the row, its file path and
+        # the activity log commit together once the file is written
+        db.flush()
 
         # Save filled invoice
         invoice_dir = Path("uploads/invoices")
@@ -221,14 +281,7 @@ def create_invoice(
         with open(file_path, 'wb') as f:
             f.write(filled_content)
 
-        # Update invoice with file info
         invoice.file_path = str(file_path)
-        invoice.file_name = f"{invoice_number}_{client.company_name}.docx"
-        invoice.file_size = len(filled_content)
-        invoice.unfilled_placeholders = unfilled_placeholders
-
-        db.commit()
-        db.refresh(invoice)
 
         # Log activity
         db.add(ActivityLog(
@@ -239,16 +292,20 @@ def create_invoice(
             message=f"Invoice {invoice_number} created from Quotation {quotation.quotation_number} for {client.company_name}",
             log_metadata={"quotation_id": quotation.id, "client_id": client.id, "template_id": template.id}
         ))
+        db.flush()
+        invoice_out = InvoiceOut.model_validate(invoice)
         db.commit()
 
-        return invoice
-
     except Exception as e:
-        # Clean up invoice record if file creation failed
-        db.delete(invoice)
-        db.commit()
+        # Nothing was committed; drop the row and any file already written
+        db.rollback()
+        if file_path is not None and file_path.exists():
+            file_path.unlink()
         raise HTTPException(status_code=500, detail=f"Failed to create invoice: {str(e)}")
 
+    invalidate_invoice_counts()
+    return invoice_out
+
 
 @router.get("/{invoice_id}", response_model=InvoiceOut)
 def get_invoice(
@@ -291,6 +348,7 @@ def update_invoice(
         setattr(invoice, key, value)
 
     db.commit()
+    invalidate_invoice_counts()
     db.refresh(invoice)
 
     # Trigger status change email if status changed to 'paid' AND user wants notification
@@ -344,6 +402,7 @@ def delete_invoice(
 
     db.delete(invoice)
     db.commit()
+    invalidate_invoice_counts()
 
     # Log activity
     db.add(ActivityLog(
@@ -408,18 +467,27 @@ async def save_invoice_callback(
             if not invoice:
                 return {"error": 1, "message": "Invoice not found"}
 
-            # Download the saved document
+            # Download the saved document, streamed to a temporary file in
+            # chunks so it is never held in memory whole; the current file is
+            # only replaced once the download completes
             import aiohttp
+            import aiofiles
             async with aiohttp.ClientSession() as session:
                 async with session.get(download_url) as response:
                     if response.status == 200:
-                        file_content = await response.read()
-
-                        # Save the updated document
-                        with open(invoice.file_path, 'wb') as f:
-                            f.write(file_content)
-
-                        invoice.file_size = len(file_content)
+                        temp_path = f"{invoice.file_path}.part"
+                        file_size = 0
+                        try:
+                            async with aiofiles.open(temp_path, 'wb') as f:
+                                async for chunk in response.content.iter_chunked(DOCUMENT_DOWNLOAD_CHUNK_SIZE):
+                                    await f.write(chunk)
+                                    file_size += len(chunk)
+                            os.replace(temp_path, invoice.file_path)
+                        finally:
+                            if os.path.exists(temp_path):
+                                os.remove(temp_path)
+
+                        invoice.file_size = file_size
                         invoice.updated_at = datetime.utcnow()
 
                         db.commit()
@@ -4,41 +4,58 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import os
-import shutil
+import threading
 from pathlib import Path
+import aiofiles
+from cachetools import TTLCache
 
 from app.db.session import get_db
-from app.models import Partner, User, Role, ActivityLog, Client
+from app.models import Partner, ActivityLog, Client
 from app.schemas import PartnerOut, UserOut
 from app.api.auth import get_current_user
+from app.api.deps import require_admin_or_superadmin
 
 class PaginatedPartnersResponse(BaseModel):
     partners: List[PartnerOut]
-    total: int
+    total: Optional[int]  # None for cursor requests, which skip the count
     page: int
     per_page: int
+    next_cursor: Optional[int] = None
 
 router = APIRouter(prefix="/partners", tags=["partners"])
 
 # Upload directory for partner contracts
 UPLOAD_DIR = Path("uploads/partner_contracts")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+CONTRACT_UPLOAD_CHUNK_SIZE = 64 * 1024
 
-# Reuse RBAC dependency
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not role or role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
+PARTNER_COUNT_CACHE_TTL_SECONDS = int(os.getenv("PARTNER_COUNT_CACHE_TTL_SECONDS", "15"))
+
+# list_partners totals by search term, so paging through one listing counts
+# once. Cleared on partner writes in this process; the TTL bounds how long
+# other workers serve an older total
+_count_cache = TTLCache(maxsize=512, ttl=PARTNER_COUNT_CACHE_TTL_SECONDS)
+_count_cache_lock = threading.Lock()
+
+def invalidate_partner_counts():
+    with _count_cache_lock:
+        _count_cache.clear()
+
+async def save_contract_file(contract_file: UploadFile, file_path: Path) -> int:
+    """Stream an uploaded contract to disk without blocking the event loop; returns its size in bytes"""
+    size = 0
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while chunk := await contract_file.read(CONTRACT_UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
+            size += len(chunk)
+    return size
 
 @router.get("/", response_model=PaginatedPartnersResponse, dependencies=[Depends(require_admin_or_superadmin)])
 def list_partners(
     page: int = Query(default=0, ge=0),
     per_page: int = Query(default=10, ge=1, le=100),
     search: Optional[str] = Query(default=None, description="Search by company name, contact person, email, or phone"),
+    cursor: Optional[int] = Query(default=None, description="next_cursor from the previous page; seeks by id instead of OFFSET and skips the total count"),
     db: Session = Depends(get_db)
 ):
     query = db.query(Partner)
@@ -50,9 +67,23 @@ def list_partners(
             (Partner.email_address.ilike(term)) |
             (Partner.phone_number.ilike(term))
         )
-    total = query.count()
-    partners = query.offset(page * per_page).limit(per_page).all()
-    return PaginatedPartnersResponse(partners=partners, total=total, page=page, per_page=per_page)
+    # Newest first, by id, so a page can hand back a keyset cursor; one extra
+    # row tells whether there is a next page
+    query = query.order_by(Partner.id.desc())
+    if cursor is not None:
+        total = None
+        rows = query.filter(Partner.id < cursor).limit(per_page + 1).all()
+    else:
+        with _count_cache_lock:
+            total = _count_cache.get(search)
+        if total is None:
+            total = query.count()
+            with _count_cache_lock:
+                _count_cache[search] = total
+        rows = query.offset(page * per_page).limit(per_page + 1).all()
+    partners = rows[:per_page]
+    next_cursor = partners[-1].id if len(rows) > per_page else None
+    return PaginatedPartnersResponse(partners=partners, total=total, page=page, per_page=per_page, next_cursor=next_cursor)
 
 @router.post("/", response_model=PartnerOut, dependencies=[Depends(require_admin_or_superadmin)])
 async def create_partner(
@@ -91,19 +122,19 @@ async def create_partner(
         file_path = UPLOAD_DIR / file_name
 
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(contract_file.file, buffer)
+        file_size = await save_contract_file(contract_file, file_path)
 
         partner_data.update({
             "contract_file_path": str(file_path.absolute()),
             "contract_file_name": contract_file.filename,
-            "contract_file_size": os.path.getsize(file_path),
+            "contract_file_size": file_size,
             "contract_mime_type": contract_file.content_type
         })
 
     partner = Partner(**partner_data)
     db.add(partner)
     db.commit()
+    invalidate_partner_counts()
     db.refresh(partner)
 
     # Log activity
@@ -176,15 +207,15 @@ async def update_partner(
         file_name = f"partner_{partner.company_name.replace(' ', '_')}_{contract_file.filename}"
         file_path = UPLOAD_DIR / file_name
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(contract_file.file, buffer)
+        file_size = await save_contract_file(contract_file, file_path)
 
         partner.contract_file_path = str(file_path.absolute())
         partner.contract_file_name = contract_file.filename
-        partner.contract_file_size = os.path.getsize(file_path)
+        partner.contract_file_size = file_size
         partner.contract_mime_type = contract_file.content_type
 
     db.commit()
+    invalidate_partner_counts()
     db.refresh(partner)
 
     # Log activity
@@ -222,6 +253,7 @@ def delete_partner(partner_id: int, db: Session = Depends(get_db), current_user:
 
     db.delete(partner)
     db.commit()
+    invalidate_partner_counts()
 
     # Log activity
     db.add(ActivityLog(
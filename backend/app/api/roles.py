@@ -6,15 +6,10 @@ from app.db.session import get_db
 
 from app.models import Role, ActivityLog
 from app.schemas.role import RoleCreate, RoleUpdate, RoleOut
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, invalidate_current_user_cache
+from app.api.deps import require_admin_or_superadmin
 from app.schemas.user import UserOut
 
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user_role = db.query(Role).filter(Role.id == current_user.role_id).first()
-    if not user_role or user_role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
-
 router = APIRouter(prefix="/roles", tags=["roles"])
 
 @router.post("/", response_model=RoleOut, dependencies=[Depends(require_admin_or_superadmin)])
@@ -57,6 +52,7 @@ def update_role(role_id: int, role_update: RoleUpdate, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Role not found")
     role.name = role_update.name
     db.commit()
+    invalidate_current_user_cache()
     db.refresh(role)
     # log update
     db.add(ActivityLog(
@@ -77,6 +73,7 @@ def delete_role(role_id: int, db: Session = Depends(get_db), current_user: UserO
         raise HTTPException(status_code=404, detail="Role not found")
     db.delete(role)
     db.commit()
+    invalidate_current_user_cache()
     # log delete
     db.add(ActivityLog(
         action="role.delete",
@@ -4,9 +4,9 @@ from app.db.session import SessionLocal, get_db
 from app.models import User, Role, ActivityLog
 from app.schemas import UserCreate, UserUpdate, UserOut
 from app.schemas.role import RoleOut
-from passlib.context import CryptContext
-from app.api.auth import get_current_user
-from typing import List, Optional
+from app.api.auth import get_current_user, get_current_user_and_role, invalidate_current_user_cache, pwd_context
+from app.api.deps import require_admin_or_superadmin
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
 class PaginatedUsersResponse(BaseModel):
@@ -15,17 +15,6 @@ class PaginatedUsersResponse(BaseModel):
     page: int
     per_page: int
 
-def require_admin_or_superadmin(current_user: UserOut = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not role or role.name not in ["admin", "superadmin"]:
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return current_user
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def get_password_hash(password):
     return pwd_context.hash(password)
 
@@ -37,25 +26,21 @@ def list_users(
     per_page: int = Query(default=10, ge=1, le=100),
     search: Optional[str] = Query(default=None, description="Search by name or email"),
     role_id: Optional[int] = Query(default=None),  # NEW
-    current_user: UserOut = Depends(get_current_user),
+    current: Tuple[UserOut, Optional[str]] = Depends(get_current_user_and_role),
     db: Session = Depends(get_db)
 ):
-    # Get current user's role to determine access
-    user = db.query(User).filter(User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=403, detail="User not found")
-    
-    current_role = db.query(Role).filter(Role.id == user.role_id).first()
-    if not current_role:
+    # Current user's role (joined into the cached user lookup) determines access
+    current_user, current_role_name = current
+    if current_role_name is None:
         raise HTTPException(status_code=403, detail="Role not found")
     
     # Check permissions and apply role-based filtering
     query = db.query(User)
     
-    if current_role.name == "superadmin":
+    if current_role_name == "superadmin":
         # Superadmin can see all users except themselves
         query = query.filter(User.id != current_user.id)
-    elif current_role.name == "admin":
+    elif current_role_name == "admin":
         # Admin can only see users with "user" role, exclude themselves
         user_role = db.query(Role).filter(Role.name == "user").first()
         if user_role:
@@ -131,6 +116,7 @@ def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db)
             raise HTTPException(status_code=400, detail="Role not found")
         user.role_id = role.id
     db.commit()
+    invalidate_current_user_cache(user_id)
     db.refresh(user)
     db.add(ActivityLog(
         action="user.update",
@@ -152,6 +138,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserO
     deleted_user_name = user.name
     db.delete(user)
     db.commit()
+    invalidate_current_user_cache(deleted_user_id)
     # log delete
     db.add(ActivityLog(
         action="user.delete",
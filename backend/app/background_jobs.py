@@ -9,6 +9,8 @@ from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from app.db.session import SessionLocal
 from app.services.email_scheduler import EmailScheduler
+from app.api.auth import flush_failed_logins, FAILED_LOGIN_FLUSH_SECONDS
+from app.api.dashboard import refresh_monthly_doc_counts
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +50,37 @@ def check_deadline_reminders_job():
         db.close()
 
 
+def flush_failed_logins_job():
+    """
+    Background job to write buffered failed-login activity logs
+    Runs every FAILED_LOGIN_FLUSH_SECONDS, so a lone failure is not held
+    until the next login
+    """
+    db = SessionLocal()
+    try:
+        flush_failed_logins(db)
+    except Exception as e:
+        logger.error(f"Error in failed-login log flush job: {str(e)}")
+    finally:
+        db.close()
+
+
+def refresh_monthly_doc_counts_job():
+    """
+    Background job to refresh the dashboard's monthly trend view
+    Runs every hour in each worker; only the one that takes the advisory lock
+    refreshes, the others skip
+    """
+    db = SessionLocal()
+    try:
+        if not refresh_monthly_doc_counts(db, wait=False):
+            logger.info("Monthly doc counts refresh already running elsewhere, skipped")
+    except Exception as e:
+        logger.error(f"Error in monthly doc counts refresh job: {str(e)}")
+    finally:
+        db.close()
+
+
 def start_background_jobs():
     """
     Start all background jobs
@@ -71,6 +104,24 @@ def start_background_jobs():
         replace_existing=True
     )
 
+    # Job 3: Flush buffered failed-login activity logs
+    scheduler.add_job(
+        func=flush_failed_logins_job,
+        trigger=IntervalTrigger(seconds=FAILED_LOGIN_FLUSH_SECONDS),
+        id='flush_failed_logins',
+        name='Flush failed-login activity logs',
+        replace_existing=True
+    )
+
+    # Job 4: Refresh the dashboard's monthly trend view every hour
+    scheduler.add_job(
+        func=refresh_monthly_doc_counts_job,
+        trigger=IntervalTrigger(hours=1),
+        id='refresh_monthly_doc_counts',
+        name='Refresh monthly document counts',
+        replace_existing=True
+    )
+
     scheduler.start()
     logger.info("Background jobs started successfully")
 
@@ -82,4 +133,6 @@ def shutdown_background_jobs():
     """
     if scheduler.running:
         scheduler.shutdown()
+        # Write out anything still buffered before the process exits
+        flush_failed_logins_job()
         logger.info("Background jobs shut down successfully")
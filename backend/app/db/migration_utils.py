@@ -0,0 +1,75 @@
+"""Helpers shared by the Alembic revisions in alembic/versions."""
+import os
+from contextlib import contextmanager
+
+from alembic import context, op
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+# Session settings an operator may raise for index builds on a large
+# database, e.g.
+#   alembic -x maintenance_work_mem=1GB -x max_parallel_maintenance_workers=4 upgrade head
+# or MIGRATION_MAINTENANCE_WORK_MEM / MIGRATION_MAX_PARALLEL_MAINTENANCE_WORKERS.
+# Unset means the server's own values are used.
+INDEX_BUILD_SETTINGS = ('maintenance_work_mem', 'max_parallel_maintenance_workers')
+
+# Rows per committed batch in update_in_pages
+PAGE_SIZE = 1000
+
+
+def migration_engine_options(url):
+    """Extra create_engine() arguments for the migration engine.
+
+    psycopg2 sends executemany (op.bulk_insert seeds) as batched multi-row
+    statements in this mode instead of one round-trip per row.
+    """
+    if make_url(url).get_driver_name() == 'psycopg2':
+        return {'executemany_mode': 'values_plus_batch', 'executemany_batch_page_size': 1000}
+    return {}
+
+
+def _configured_index_build_settings():
+    x_args = context.get_x_argument(as_dictionary=True)
+    settings = {}
+    for name in INDEX_BUILD_SETTINGS:
+        value = x_args.get(name) or os.getenv(f"MIGRATION_{name.upper()}")
+        if value:
+            settings[name] = value
+    return settings
+
+
+@contextmanager
+def index_build_settings():
+    """Apply the configured index build settings to the statements inside.
+
+    Use within op.get_context().autocommit_block(): the settings are set for
+    the session, since SET LOCAL would expire with each autocommit statement,
+    and reset on the way out.
+    """
+    settings = _configured_index_build_settings()
+    for name, value in settings.items():
+        op.execute(text("SELECT set_config(:name, :value, false)").bindparams(name=name, value=value))
+    try:
+        yield
+    finally:
+        for name in settings:
+            op.execute(f"RESET {name}")
+
+
+def update_in_pages(sql):
+    """Run a keyset-paginated UPDATE, committing each page on its own.
+
+    ``sql`` must select its page with ``id > :last_id ... LIMIT :page_size``
+    and end in ``RETURNING id``.
+    """
+    stmt = text(sql)
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = 0
+        while True:
+            ids = connection.execute(
+                stmt, {"last_id": last_id, "page_size": PAGE_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            last_id = max(ids)
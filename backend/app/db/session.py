@@ -10,8 +10,26 @@ from contextlib import contextmanager
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(DATABASE_URL)
+# Sync endpoints run in a threadpool of 40, plus the background scheduler, so
+# the default 5 + 10 connections queue requests on checkout under load. The
+# defaults allow 30 per process; keep (workers x that) under Postgres'
+# max_connections (100 by default). Behind PgBouncer in transaction mode,
+# lower DB_POOL_SIZE and let PgBouncer do the pooling.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "3600"))
+
+engine_options = {"pool_pre_ping": True}
+if not DATABASE_URL.startswith("sqlite"):
+    engine_options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    )
+
+engine = create_engine(DATABASE_URL, **engine_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
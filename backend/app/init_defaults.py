@@ -8,7 +8,15 @@ from app.db.session import engine, SessionLocal
 from app.models import User, Role, EmailSettings, AutomationTemplate, EmailTemplate
 from app.init_roles import create_default_roles
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Same schemes as app.api.auth.pwd_context
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -1,5 +1,5 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.auth import auth_router
 from app.api import users
@@ -33,6 +33,18 @@ def on_shutdown():
     """Shutdown background jobs when the app stops"""
     shutdown_background_jobs()
 
+@app.middleware("http")
+async def invalidate_dashboard_on_write(request: Request, call_next):
+    """Drop cached dashboard statistics after a successful write they depend on"""
+    response = await call_next(request)
+    if (
+        request.method in ("POST", "PUT", "PATCH", "DELETE")
+        and request.url.path.startswith(dashboard.DASHBOARD_SOURCE_PREFIXES)
+        and response.status_code < 400
+    ):
+        dashboard.invalidate_dashboard_statistics()
+    return response
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
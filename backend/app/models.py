@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Table, ForeignKey, DateTime, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Table, ForeignKey, DateTime, Text, JSON, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .db.session import Base
 
+# JSONB on PostgreSQL so columns can carry GIN indexes; plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -15,6 +19,12 @@ class User(Base):
     role_id = Column(Integer, ForeignKey('roles.id'), nullable=False)
     role = relationship('Role', back_populates='users')
 
+    # Covers the token -> user lookup so it can be an index-only scan
+    __table_args__ = (
+        Index('ix_users_email_covering', 'email',
+              postgresql_include=['id', 'name', 'role_id']),
+    )
+
 class Role(Base):
     __tablename__ = 'roles'
 
@@ -41,6 +51,18 @@ class Partner(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # Trigram GIN indexes serve the ILIKE '%term%' partner search
+    __table_args__ = (
+        Index('ix_partners_company_name_trgm', 'company_name',
+              postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'}),
+        Index('ix_partners_contact_person_name_trgm', 'contact_person_name',
+              postgresql_using='gin', postgresql_ops={'contact_person_name': 'gin_trgm_ops'}),
+        Index('ix_partners_email_address_trgm', 'email_address',
+              postgresql_using='gin', postgresql_ops={'email_address': 'gin_trgm_ops'}),
+        Index('ix_partners_phone_number_trgm', 'phone_number',
+              postgresql_using='gin', postgresql_ops={'phone_number': 'gin_trgm_ops'}),
+    )
+
 class Client(Base):
     __tablename__ = 'clients'
 
@@ -48,7 +70,7 @@ class Client(Base):
     company_name = Column(String(100), nullable=False)
     uen = Column(String(50), nullable=True)  # New field for UEN
     industry = Column(String(100), nullable=True)  # New field for Industry
-    contacts = Column(JSON, nullable=False)  # JSON array of contact objects
+    contacts = Column(JSONType, nullable=False)  # JSON array of contact objects
     address = Column(String(200), nullable=True)
     postal_code = Column(String(10), nullable=True)
 
@@ -56,6 +78,37 @@ class Client(Base):
     partner_id = Column(Integer, ForeignKey('partners.id'), nullable=True, index=True)
     partner = relationship('Partner')
 
+    # GIN index serves contact email lookups via @> containment; trigram GIN
+    # indexes serve the ILIKE '%term%' client search; the primary contact
+    # email is unique case-insensitively. The two expression indexes use
+    # Postgres-only syntax, so they are only created there
+    __table_args__ = (
+        Index('ix_clients_contacts_gin', 'contacts',
+              postgresql_using='gin', postgresql_ops={'contacts': 'jsonb_path_ops'}),
+        Index('ix_clients_company_name_trgm', 'company_name',
+              postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'}),
+        Index('ix_clients_uen_trgm', 'uen',
+              postgresql_using='gin', postgresql_ops={'uen': 'gin_trgm_ops'}),
+        Index('ix_clients_industry_trgm', 'industry',
+              postgresql_using='gin', postgresql_ops={'industry': 'gin_trgm_ops'}),
+        Index('ix_clients_contacts_text_trgm', text("(contacts::text) gin_trgm_ops"),
+              postgresql_using='gin').ddl_if(dialect='postgresql'),
+        Index('ix_clients_primary_email', text("lower(contacts->0->>'email')"),
+              unique=True).ddl_if(dialect='postgresql'),
+    )
+
+class ClientContactEmail(Base):
+    """One row per client contact email, kept in step with Client.contacts.
+
+    Emails are stored lowercased, so the primary key makes them unique across
+    clients regardless of case; duplicate checks are a B-tree probe and
+    concurrent writers cannot both claim one.
+    """
+    __tablename__ = 'client_contact_emails'
+
+    email = Column(String(255), primary_key=True)
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete='CASCADE'), nullable=False, index=True)
+
 class ActivityLog(Base):
     __tablename__ = 'activity_logs'
 
@@ -65,7 +118,7 @@ class ActivityLog(Base):
     target_type = Column(String(50), nullable=True, index=True)  # e.g., "user", "role"
     target_id = Column(Integer, nullable=True)  # id of the target entity
     message = Column(String(500), nullable=True)  # human-readable message
-    log_metadata = Column(JSON, nullable=True)  # additional structured data
+    log_metadata = Column(JSONType, nullable=True)  # additional structured data
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
     # Relationship to User (actor)
@@ -84,8 +137,8 @@ class Template(Base):
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     template_type = Column(String(50), nullable=False, index=True)  # 'quotation' or 'invoice'
-    content = Column(JSON, nullable=False)  # Updated: stores file metadata and optional HTML
-    variables = Column(JSON, nullable=True)  # Template variables/placeholders
+    content = Column(JSONType, nullable=False)  # Updated: stores file metadata and optional HTML
+    variables = Column(JSONType, nullable=True)  # Template variables/placeholders
     is_ai_enhanced = Column(Boolean, default=False)  # Whether AI processing was applied
     status = Column(String(20), default='unsaved')  # 'saved', 'unsaved', 'draft'
 
@@ -115,13 +168,13 @@ class Quotation(Base):
 
     # Client relationship
     client_id = Column(Integer, ForeignKey('clients.id'), nullable=False, index=True)
-    selected_contact = Column(JSON, nullable=False)  # Store selected contact info from client
+    selected_contact = Column(JSONType, nullable=False)  # Store selected contact info from client
 
     # Template relationship
     template_id = Column(Integer, ForeignKey('templates.id'), nullable=False, index=True)
 
     # User's company information (JSON field for flexibility)
-    my_company_info = Column(JSON, nullable=True)  # Stores company data like name, email, phone, address, website
+    my_company_info = Column(JSONType, nullable=True)  # Stores company data like name, email, phone, address, website
 
     # Quotation document
     file_path = Column(String(500), nullable=True)  # Path to filled quotation DOCX
@@ -132,14 +185,14 @@ class Quotation(Base):
     due_date = Column(DateTime(timezone=True), nullable=True)  # When payment is due
 
     # Status tracking
-    status = Column(String(50), default='pending', index=True)  # 'pending', 'accepted', or 'rejected'
+    status = Column(String(50), default='pending')  # 'pending', 'accepted', or 'rejected'
 
     # Placeholder tracking
-    unfilled_placeholders = Column(JSON, nullable=True)  # List of placeholders that haven't been filled
+    unfilled_placeholders = Column(JSONType, nullable=True)  # List of placeholders that haven't been filled
 
     # Metadata
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
@@ -147,8 +200,20 @@ class Quotation(Base):
     template = relationship('Template', foreign_keys=[template_id])
     creator = relationship('User', foreign_keys=[created_by])
 
-    # Composite index for efficient queries
+    # Partial index on open statuses; GIN indexes for JSON containment lookups;
+    # (client_id, created_at) for a client's documents newest first;
+    # created_at DESC for the dashboard's recent quotations
     __table_args__ = (
+        Index('ix_quotations_client_created', 'client_id', 'created_at'),
+        Index('ix_quotations_created_desc', created_at.desc()),
+        Index('ix_quotations_status_active', 'status',
+              postgresql_where=text("status IN ('pending', 'unpaid')")),
+        Index('ix_quotations_selected_contact_gin', 'selected_contact',
+              postgresql_using='gin', postgresql_ops={'selected_contact': 'jsonb_path_ops'}),
+        Index('ix_quotations_my_company_info_gin', 'my_company_info',
+              postgresql_using='gin', postgresql_ops={'my_company_info': 'jsonb_path_ops'}),
+        Index('ix_quotations_unfilled_placeholders_gin', 'unfilled_placeholders',
+              postgresql_using='gin', postgresql_ops={'unfilled_placeholders': 'jsonb_path_ops'}),
         {'extend_existing': True}
     )
 
@@ -163,13 +228,13 @@ class Invoice(Base):
 
     # Client relationship (copied from quotation for convenience)
     client_id = Column(Integer, ForeignKey('clients.id'), nullable=False, index=True)
-    selected_contact = Column(JSON, nullable=False)  # Store selected contact info from quotation
+    selected_contact = Column(JSONType, nullable=False)  # Store selected contact info from quotation
 
     # Template relationship
     template_id = Column(Integer, ForeignKey('templates.id'), nullable=False, index=True)
 
     # User's company information (JSON field for flexibility)
-    my_company_info = Column(JSON, nullable=True)  # Stores company data like name, email, phone, address, website
+    my_company_info = Column(JSONType, nullable=True)  # Stores company data like name, email, phone, address, website
 
     # Invoice document
     file_path = Column(String(500), nullable=True)  # Path to filled invoice DOCX
@@ -180,14 +245,14 @@ class Invoice(Base):
     due_date = Column(DateTime(timezone=True), nullable=True)  # When payment is due
 
     # Status tracking
-    status = Column(String(50), default='unpaid', index=True)  # 'unpaid' or 'paid'
+    status = Column(String(50), default='unpaid')  # 'unpaid' or 'paid'
 
     # Placeholder tracking
-    unfilled_placeholders = Column(JSON, nullable=True)  # List of placeholders that haven't been filled
+    unfilled_placeholders = Column(JSONType, nullable=True)  # List of placeholders that haven't been filled
 
     # Metadata
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Relationships
@@ -196,20 +261,50 @@ class Invoice(Base):
     template = relationship('Template', foreign_keys=[template_id])
     creator = relationship('User', foreign_keys=[created_by])
 
-    # Composite index for efficient queries
+    # Partial index on unpaid status; GIN indexes for JSON containment lookups;
+    # (client_id, created_at) for a client's documents newest first;
+    # (created_at DESC, id DESC) for the dashboard's recent invoices and
+    # list_invoices' keyset; its status-filtered variant and the
+    # invoice_number trigram index for list_invoices
     __table_args__ = (
+        Index('ix_invoices_client_created', 'client_id', 'created_at'),
+        Index('ix_invoices_created_desc', created_at.desc(), id.desc()),
+        Index('ix_invoices_status_unpaid', 'status',
+              postgresql_where=text("status = 'unpaid'")),
+        Index('ix_invoices_status_created', status, created_at.desc(), id.desc()),
+        Index('ix_invoices_invoice_number_trgm', 'invoice_number',
+              postgresql_using='gin', postgresql_ops={'invoice_number': 'gin_trgm_ops'}),
+        Index('ix_invoices_selected_contact_gin', 'selected_contact',
+              postgresql_using='gin', postgresql_ops={'selected_contact': 'jsonb_path_ops'}),
+        Index('ix_invoices_my_company_info_gin', 'my_company_info',
+              postgresql_using='gin', postgresql_ops={'my_company_info': 'jsonb_path_ops'}),
+        Index('ix_invoices_unfilled_placeholders_gin', 'unfilled_placeholders',
+              postgresql_using='gin', postgresql_ops={'unfilled_placeholders': 'jsonb_path_ops'}),
         {'extend_existing': True}
     )
 
+class InvoiceCounter(Base):
+    """Last INV-{year}-NNNN number handed out per year (legacy invoice numbering).
+
+    Incremented with an upsert ... RETURNING, so each number is allocated
+    atomically in one statement instead of reading back the highest one.
+    """
+    __tablename__ = 'invoice_counters'
+
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    last_value = Column(Integer, nullable=False)
+
 class EmailTemplate(Base):
     __tablename__ = 'email_templates'
+    # Fetch server defaults (id, timestamps) with the INSERT's RETURNING
+    __mapper_args__ = {'eager_defaults': True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     subject = Column(String(500), nullable=False)
     body = Column(Text, nullable=False)  # HTML email body
     template_type = Column(String(50), nullable=False, index=True)  # 'quotation' or 'invoice' or 'general'
-    variables = Column(JSON, nullable=True)  # Available variables for template
+    variables = Column(JSONType, nullable=True)  # Available variables for template
     is_default = Column(Boolean, default=False)  # Is this the default template
 
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
@@ -229,32 +324,32 @@ class EmailHistory(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Email details
-    recipient_email = Column(String(255), nullable=False, index=True)
+    recipient_email = Column(String(255), nullable=False)
     recipient_name = Column(String(255), nullable=True)
     subject = Column(String(500), nullable=False)
     body = Column(Text, nullable=False)  # HTML email body
 
     # Related documents (with SET NULL on delete)
-    quotation_id = Column(Integer, ForeignKey('quotations.id', ondelete='SET NULL'), nullable=True, index=True)
-    invoice_id = Column(Integer, ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True, index=True)
+    quotation_id = Column(Integer, ForeignKey('quotations.id', ondelete='SET NULL'), nullable=True)
+    invoice_id = Column(Integer, ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True)
 
     # Document snapshot (preserved even if document deleted)
-    document_number = Column(String(100), nullable=True, index=True)  # Q-2025-0001 or INV-2025-0001
+    document_number = Column(String(100), nullable=True)  # Q-2025-0001 or INV-2025-0001
     document_type = Column(String(20), nullable=True)  # 'quotation' or 'invoice'
 
     # Email template used
     email_template_id = Column(Integer, ForeignKey('email_templates.id'), nullable=True)
 
     # Status tracking
-    status = Column(String(50), default='sent', index=True)  # 'sent', 'failed', 'pending'
+    status = Column(String(50), default='sent')  # 'sent', 'failed', 'pending'
     error_message = Column(Text, nullable=True)  # Error message if failed
 
     # Attachments
-    attachments = Column(JSON, nullable=True)  # List of attached file paths
+    attachments = Column(JSONType, nullable=True)  # List of attached file paths
 
     # Metadata
     sent_by = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
-    sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     quotation = relationship('Quotation', foreign_keys=[quotation_id])
@@ -262,12 +357,34 @@ class EmailHistory(Base):
     email_template = relationship('EmailTemplate', foreign_keys=[email_template_id])
     sender = relationship('User', foreign_keys=[sent_by])
 
+    # Listing filters paired with the sent_at DESC sort (partial on the
+    # mostly-NULL document links); covering index for a recipient's timeline
+    # (index-only scan, newest first); sent_at DESC for the dashboard's
+    # recent emails
     __table_args__ = (
+        Index('ix_email_history_sent_desc', sent_at.desc()),
+        Index('ix_email_history_status_sent', status, sent_at.desc()),
+        Index('ix_email_history_quotation_sent', quotation_id, sent_at.desc(),
+              postgresql_where=text("quotation_id IS NOT NULL")),
+        Index('ix_email_history_invoice_sent', invoice_id, sent_at.desc(),
+              postgresql_where=text("invoice_id IS NOT NULL")),
+        Index('ix_email_history_document_type_sent', document_type, sent_at.desc()),
+        Index('ix_email_history_document_number', 'document_number',
+              postgresql_where=text("document_number IS NOT NULL")),
+        Index('ix_email_history_recipient_time', recipient_email, sent_at.desc(),
+              postgresql_include=['subject', 'status']),
+        # ILIKE '%term%' search in list_email_history
+        Index('ix_email_history_recipient_email_trgm', 'recipient_email',
+              postgresql_using='gin', postgresql_ops={'recipient_email': 'gin_trgm_ops'}),
+        Index('ix_email_history_subject_trgm', 'subject',
+              postgresql_using='gin', postgresql_ops={'subject': 'gin_trgm_ops'}),
         {'extend_existing': True}
     )
 
 class ScheduledEmail(Base):
     __tablename__ = 'scheduled_emails'
+    # Fetch server defaults (id, timestamps) with the INSERT's RETURNING
+    __mapper_args__ = {'eager_defaults': True}
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -278,11 +395,11 @@ class ScheduledEmail(Base):
     body = Column(Text, nullable=False)  # HTML email body
 
     # Related documents (with SET NULL on delete)
-    quotation_id = Column(Integer, ForeignKey('quotations.id', ondelete='SET NULL'), nullable=True, index=True)
-    invoice_id = Column(Integer, ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True, index=True)
+    quotation_id = Column(Integer, ForeignKey('quotations.id', ondelete='SET NULL'), nullable=True)
+    invoice_id = Column(Integer, ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True)
 
     # Document snapshot (preserved even if document deleted)
-    document_number = Column(String(100), nullable=True, index=True)  # Q-2025-0001 or INV-2025-0001
+    document_number = Column(String(100), nullable=True)  # Q-2025-0001 or INV-2025-0001
     document_type = Column(String(20), nullable=True)  # 'quotation' or 'invoice'
 
     # Email template used
@@ -291,21 +408,21 @@ class ScheduledEmail(Base):
     # Scheduling details
     scheduled_time = Column(DateTime(timezone=True), nullable=False, index=True)  # When to send
     is_recurring = Column(Boolean, default=False)  # Is this a recurring email
-    recurrence_pattern = Column(JSON, nullable=True)  # {'frequency': 'daily/weekly/monthly', 'interval': 1, 'end_date': '2025-12-31'}
+    recurrence_pattern = Column(JSONType, nullable=True)  # {'frequency': 'daily/weekly/monthly', 'interval': 1, 'end_date': '2025-12-31'}
 
     # Trigger type
-    trigger_type = Column(String(50), nullable=True, index=True)  # 'manual', 'deadline', 'status_change', 'reminder'
-    trigger_config = Column(JSON, nullable=True)  # Additional trigger configuration
+    trigger_type = Column(String(50), nullable=True)  # 'manual', 'deadline', 'status_change', 'reminder'
+    trigger_config = Column(JSONType, nullable=True)  # Additional trigger configuration
 
     # Status tracking
-    status = Column(String(50), default='pending', index=True)  # 'pending', 'sent', 'cancelled', 'failed'
+    status = Column(String(50), default='pending')  # 'pending', 'sent', 'cancelled', 'failed'
     last_sent_at = Column(DateTime(timezone=True), nullable=True)  # For recurring emails
     next_send_at = Column(DateTime(timezone=True), nullable=True)  # For recurring emails
     error_message = Column(Text, nullable=True)
 
     # Attachments
-    attachments = Column(JSON, nullable=True)  # List of file paths to attach
-    attach_document = Column(Boolean, default=False)  # Whether to attach the quotation/invoice DOCX
+    attachments = Column(JSONType, nullable=True)  # List of file paths to attach
+    attach_document = Column(Boolean, default=False, nullable=False)  # Whether to attach the quotation/invoice DOCX
 
     # Metadata
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
@@ -318,7 +435,22 @@ class ScheduledEmail(Base):
     email_template = relationship('EmailTemplate', foreign_keys=[email_template_id])
     creator = relationship('User', foreign_keys=[created_by])
 
+    # Partial indexes on the mostly-NULL document links and on the pending
+    # work queue for the scheduler poll
     __table_args__ = (
+        Index('ix_scheduled_emails_quotation_id', 'quotation_id',
+              postgresql_where=text("quotation_id IS NOT NULL")),
+        Index('ix_scheduled_emails_invoice_id', 'invoice_id',
+              postgresql_where=text("invoice_id IS NOT NULL")),
+        Index('ix_scheduled_emails_document_number', 'document_number',
+              postgresql_where=text("document_number IS NOT NULL")),
+        Index('ix_scheduled_emails_ready', 'next_send_at',
+              postgresql_where=text("status = 'pending'")),
+        Index('ix_scheduled_emails_due', 'scheduled_time',
+              postgresql_where=text("status = 'pending'")),
+        # list_scheduled_emails filters, paired with its scheduled_time DESC sort
+        Index('ix_scheduled_emails_status_scheduled', status, scheduled_time.desc()),
+        Index('ix_scheduled_emails_trigger_scheduled', trigger_type, scheduled_time.desc()),
         {'extend_existing': True}
     )
 
@@ -337,10 +469,10 @@ class Notification(Base):
     related_id = Column(Integer, nullable=True)
 
     # Additional data
-    notification_metadata = Column(JSON, nullable=True)
+    notification_metadata = Column(JSONType, nullable=True)
 
     # User assignment
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
 
     # Status
     is_read = Column(Boolean, default=False, index=True)
@@ -352,12 +484,18 @@ class Notification(Base):
     # Relationships
     user = relationship('User', foreign_keys=[user_id])
 
+    # A user's notifications, unread first then newest (list_notifications)
     __table_args__ = (
+        Index('ix_notifications_user_read_created', user_id, is_read, created_at.desc()),
+        # Just the unread rows, for unread counts and mark-all-read
+        Index('ix_notifications_unread', user_id, postgresql_where=text("is_read = false")),
         {'extend_existing': True}
     )
 
 class EmailSettings(Base):
     __tablename__ = 'email_settings'
+    # Fetch server defaults (id, timestamps) with the INSERT's RETURNING
+    __mapper_args__ = {'eager_defaults': True}
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -384,7 +522,7 @@ class EmailSettings(Base):
     email_signature = Column(Text, nullable=True)  # HTML signature
 
     # User/Organization
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)  # NULL = organization-wide settings
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)  # NULL = organization-wide settings
     is_active = Column(Boolean, default=True)
 
     # Metadata
@@ -394,7 +532,10 @@ class EmailSettings(Base):
     # Relationships
     user = relationship('User', foreign_keys=[user_id])
 
+    # One row per user and one organization-wide row (NULLs not distinct)
     __table_args__ = (
+        Index('ix_email_settings_user_id_unique', user_id, unique=True,
+              postgresql_nulls_not_distinct=True),
         {'extend_existing': True}
     )
 
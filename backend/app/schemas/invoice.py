@@ -78,6 +78,7 @@ class InvoiceListItem(BaseModel):
 
 class PaginatedInvoicesResponse(BaseModel):
     invoices: List[InvoiceListItem]
-    total: int
+    total: Optional[int]  # None for cursor requests, which skip the count
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # opaque (created_at, id) keyset
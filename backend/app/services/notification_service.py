@@ -1,5 +1,6 @@
 import logging
 from typing import Optional, Dict, Any
+from sqlalchemy import select, func, update, delete
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -51,16 +52,19 @@ class NotificationService:
         """
         Mark a notification as read
         """
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
+        # UPDATE ... RETURNING: one round trip instead of SELECT, UPDATE and refresh
+        notification = db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .values(is_read=True, read_at=datetime.now())
+            .returning(Notification)
+        ).scalar_one_or_none()
 
         if notification:
-            notification.is_read = True
-            notification.read_at = datetime.now()
+            # Detach with the returned values loaded, so the commit doesn't
+            # expire them and the caller's serialization doesn't reload the row
+            db.expunge(notification)
             db.commit()
-            db.refresh(notification)
             logger.info(f"Marked notification {notification_id} as read")
 
         return notification
@@ -74,13 +78,15 @@ class NotificationService:
         Mark all notifications as read for a user
         Returns: Number of notifications marked as read
         """
-        count = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).update({
-            'is_read': True,
-            'read_at': datetime.now()
-        })
+        # One UPDATE on the unread rows (ix_notifications_unread); nothing in
+        # this session needs syncing, so skip evaluating loaded instances
+        result = db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True, read_at=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+        count = result.rowcount
         db.commit()
 
         logger.info(f"Marked {count} notifications as read for user {user_id}")
@@ -95,19 +101,36 @@ class NotificationService:
         """
         Delete a notification
         """
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
+        result = db.execute(
+            delete(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+        )
 
-        if notification:
-            db.delete(notification)
+        if result.rowcount:
             db.commit()
             logger.info(f"Deleted notification {notification_id}")
             return True
 
         return False
 
+    @staticmethod
+    def get_version(
+        db: Session,
+        user_id: int
+    ) -> tuple:
+        """
+        Cheap fingerprint of a user's notifications that changes on any
+        create, delete or read: (count, max id, unread count, latest read_at)
+        """
+        return tuple(db.execute(
+            select(
+                func.count(),
+                func.max(Notification.id),
+                func.count().filter(Notification.is_read == False),
+                func.max(Notification.read_at),
+            ).where(Notification.user_id == user_id)
+        ).one())
+
     @staticmethod
     def get_unread_count(
         db: Session,
@@ -116,12 +139,12 @@ class NotificationService:
         """
         Get count of unread notifications for a user
         """
-        count = db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).count()
-
-        return count
+        # Plain SELECT count(*), no subquery wrapper; served by ix_notifications_unread
+        return db.scalar(
+            select(func.count())
+            .select_from(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+        )
 
     @staticmethod
     def create_email_sent_notification(
@@ -19,6 +19,12 @@ from typing import Generator
 from app.db.session import Base, get_db
 from app.main import app
 from app.models import User, Role, Client, Template, Quotation
+from app.api import auth as auth_module
+from app.api import dashboard as dashboard_module
+from app.api import company_settings as company_settings_module
+from app.api import emails as emails_module
+from app.api import invoices as invoices_module
+from app.api import partners as partners_module
 from app.api.auth import hash_password
 
 # Use in-memory SQLite for testing - completely isolated from production DB
@@ -54,6 +60,24 @@ def db() -> Generator[Session, None, None]:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """
+    Tokens minted in the same second are identical across tests, and each
+    test starts from a fresh database, so drop the in-process auth,
+    dashboard, company settings, email template and list count caches.
+    """
+    auth_module._verified_logins.clear()
+    auth_module._current_user_cache.clear()
+    auth_module._failed_login_buffer.clear()
+    dashboard_module.invalidate_dashboard_statistics()
+    company_settings_module._settings_cache.clear()
+    emails_module.invalidate_template_cache()
+    invoices_module.invalidate_invoice_counts()
+    partners_module.invalidate_partner_counts()
+    yield
+
+
 @pytest.fixture(scope="function")
 def client(db: Session) -> Generator[TestClient, None, None]:
     """
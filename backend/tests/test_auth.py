@@ -12,8 +12,9 @@ Tests for authentication endpoints including:
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from passlib.hash import bcrypt
 
-from app.models import User, ActivityLog
+from app.models import User, Role, ActivityLog
 from app.api.auth import hash_password, verify_password
 
 
@@ -44,6 +45,24 @@ class TestAuthentication:
         assert log is not None
         assert log.message == "User logged in"
 
+    def test_login_upgrades_bcrypt_hash(self, client: TestClient, test_user: User, db: Session):
+        """Test a legacy bcrypt hash is rehashed with argon2 on login"""
+        test_user.password = bcrypt.hash("testpassword123")
+        db.commit()
+
+        response = client.post(
+            "/auth/token",
+            data={
+                "username": "admin@test.com",
+                "password": "testpassword123"
+            }
+        )
+
+        assert response.status_code == 200
+        db.refresh(test_user)
+        assert test_user.password.startswith("$argon2id$")
+        assert verify_password("testpassword123", test_user.password)
+
     def test_login_invalid_email(self, client: TestClient, test_user: User):
         """Test login with invalid email"""
         response = client.post(
@@ -70,6 +89,29 @@ class TestAuthentication:
         assert response.status_code == 401
         assert "Incorrect username or password" in response.json()["detail"]
 
+    def test_login_failure_logged(self, client: TestClient, test_user: User, db: Session):
+        """Test failed logins are written to the activity log"""
+        for _ in range(2):
+            client.post(
+                "/auth/token",
+                data={
+                    "username": "admin@test.com",
+                    "password": "wrongpassword"
+                }
+            )
+        client.post(
+            "/auth/token",
+            data={
+                "username": "admin@test.com",
+                "password": "testpassword123"
+            }
+        )
+
+        count = db.query(ActivityLog).filter(
+            ActivityLog.action == "auth.login_failure"
+        ).count()
+        assert count == 2
+
     def test_get_current_user(self, client: TestClient, auth_headers: dict):
         """Test retrieving current authenticated user"""
         response = client.get("/auth/users/me", headers=auth_headers)
@@ -121,6 +163,27 @@ class TestAuthentication:
         ).first()
         assert log is not None
 
+    def test_login_old_password_rejected_after_change(self, client: TestClient, auth_headers: dict):
+        """Test a recently verified login does not outlive a password change"""
+        client.post(
+            "/auth/change-password",
+            headers=auth_headers,
+            json={
+                "current_password": "testpassword123",
+                "new_password": "newpassword456"
+            }
+        )
+
+        response = client.post(
+            "/auth/token",
+            data={
+                "username": "admin@test.com",
+                "password": "testpassword123"
+            }
+        )
+
+        assert response.status_code == 401
+
     def test_change_password_wrong_current(self, client: TestClient, auth_headers: dict, db: Session):
         """Test password change with incorrect current password"""
         response = client.post(
@@ -164,7 +227,7 @@ class TestPasswordHashing:
 
         assert hashed != password
         assert len(hashed) > 0
-        assert hashed.startswith("$2b$")  # bcrypt hash format
+        assert hashed.startswith("$argon2id$")  # argon2id hash format
 
     def test_verify_password_correct(self):
         """Test password verification with correct password"""
@@ -226,6 +289,64 @@ class TestRoleBasedAccess:
         assert response.status_code == 403
         assert "Insufficient permissions" in response.json()["detail"]
 
+    @pytest.mark.parametrize("method,path", [
+        ("post", "/users/"),
+        ("get", "/roles/"),
+        ("put", "/company-settings/"),
+    ])
+    def test_regular_user_cannot_access_admin_routes(
+        self, client: TestClient, test_regular_user: User, method: str, path: str
+    ):
+        """Test the users, roles and company settings routers share the admin check"""
+        login_response = client.post(
+            "/auth/token",
+            data={
+                "username": "user@test.com",
+                "password": "userpassword123"
+            }
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        response = client.request(method, path, headers=headers, json={})
+
+        assert response.status_code == 403
+        assert "Insufficient permissions" in response.json()["detail"]
+
+    def test_admin_access_company_settings(self, client: TestClient, auth_headers: dict):
+        """Test admin can update company settings"""
+        response = client.put("/company-settings/", headers=auth_headers, json={})
+
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("role_id,role_name,expected_status", [
+        (1, "auditor", 403),
+        (7, "admin", 200),
+        (8, "superadmin", 200),
+    ])
+    def test_company_settings_checks_role_name(
+        self, client: TestClient, db: Session, role_id: int, role_name: str, expected_status: int
+    ):
+        """Test company settings access follows the role name, not the old role ids 1 and 2"""
+        db.add(Role(id=role_id, name=role_name))
+        db.add(User(
+            name="Role Holder",
+            email="holder@test.com",
+            password=hash_password("holderpassword123"),
+            role_id=role_id
+        ))
+        db.commit()
+        login_response = client.post(
+            "/auth/token",
+            data={"username": "holder@test.com", "password": "holderpassword123"}
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        response = client.put("/company-settings/", headers=headers, json={})
+
+        assert response.status_code == expected_status
+        if expected_status == 403:
+            assert response.json()["detail"] == "Insufficient permissions"
+
     def test_unauthenticated_cannot_access_quotations(self, client: TestClient):
         """Test unauthenticated user cannot access protected endpoint"""
         response = client.get("/quotations/")
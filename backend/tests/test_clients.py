@@ -0,0 +1,206 @@
+"""
+Client Management API Tests
+
+Tests for client endpoints including:
+- Contact email uniqueness across clients (client_contact_emails)
+- List clients with page and cursor pagination
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import ClientContactEmail
+
+
+def make_client_payload(company_name: str, *emails: str) -> dict:
+    return {
+        "company_name": company_name,
+        "contacts": [
+            {"name": f"Contact {i}", "email": email}
+            for i, email in enumerate(emails)
+        ]
+    }
+
+
+def contact_emails(db: Session, client_id: int) -> set:
+    db.expire_all()
+    return {
+        row.email
+        for row in db.query(ClientContactEmail).filter(ClientContactEmail.client_id == client_id)
+    }
+
+
+class TestClientContactEmails:
+    """Test that contact emails stay unique across clients"""
+
+    def test_create_client_records_contact_emails(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test creating a client records its contact emails, lowercased"""
+        response = client.post(
+            "/clients/",
+            headers=auth_headers,
+            json=make_client_payload("Acme Pte Ltd", "Alice@acme.com", "bob@acme.com")
+        )
+
+        assert response.status_code == 200
+        assert contact_emails(db, response.json()["id"]) == {"alice@acme.com", "bob@acme.com"}
+
+    def test_create_client_duplicate_email_rejected(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        """Test a contact email already used by another client is rejected, whatever its case"""
+        client.post("/clients/", headers=auth_headers, json=make_client_payload("Acme Pte Ltd", "alice@acme.com"))
+
+        response = client.post(
+            "/clients/",
+            headers=auth_headers,
+            json=make_client_payload("Other Pte Ltd", "new@other.com", "ALICE@acme.com")
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email ALICE@acme.com already exists"
+
+    def test_update_client_replaces_contact_emails(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test updating contacts frees the old emails for other clients"""
+        created = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Acme Pte Ltd", "alice@acme.com")
+        ).json()
+
+        response = client.put(
+            f"/clients/{created['id']}",
+            headers=auth_headers,
+            json={"contacts": [{"name": "Carol", "email": "carol@acme.com"}]}
+        )
+
+        assert response.status_code == 200
+        assert contact_emails(db, created["id"]) == {"carol@acme.com"}
+
+        response = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Other Pte Ltd", "alice@acme.com")
+        )
+        assert response.status_code == 200
+
+    def test_update_client_duplicate_email_rejected(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test updating contacts to another client's email is rejected without writing"""
+        client.post("/clients/", headers=auth_headers, json=make_client_payload("Acme Pte Ltd", "alice@acme.com"))
+        other = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Other Pte Ltd", "dave@other.com")
+        ).json()
+
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.get_bind(), "before_cursor_execute", record)
+        try:
+            response = client.put(
+                f"/clients/{other['id']}",
+                headers=auth_headers,
+                json={"contacts": [{"name": "Alice", "email": "Alice@acme.com"}]}
+            )
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", record)
+
+        assert response.status_code == 400
+        assert not [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+        assert contact_emails(db, other["id"]) == {"dave@other.com"}
+
+    def test_update_client_keeps_own_emails(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test a client can resubmit its own contact emails"""
+        created = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Acme Pte Ltd", "alice@acme.com")
+        ).json()
+
+        response = client.put(
+            f"/clients/{created['id']}",
+            headers=auth_headers,
+            json={"contacts": [{"name": "Alice", "email": "Alice@acme.com"}]}
+        )
+
+        assert response.status_code == 200
+        assert contact_emails(db, created["id"]) == {"alice@acme.com"}
+
+    def test_delete_client_frees_contact_emails(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test deleting a client removes its contact emails"""
+        created = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Acme Pte Ltd", "alice@acme.com")
+        ).json()
+
+        response = client.delete(f"/clients/{created['id']}", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert contact_emails(db, created["id"]) == set()
+
+        response = client.post(
+            "/clients/", headers=auth_headers, json=make_client_payload("Other Pte Ltd", "alice@acme.com")
+        )
+        assert response.status_code == 200
+
+
+class TestClientListing:
+    """Test client listing in page and cursor modes"""
+
+    def test_list_clients_cursor_paging(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        """Test next_cursor walks every client newest first, without totals"""
+        created_ids = [
+            client.post(
+                "/clients/", headers=auth_headers, json=make_client_payload(f"Company {i}", f"contact{i}@test.com")
+            ).json()["id"]
+            for i in range(5)
+        ]
+
+        first_page = client.get("/clients/?per_page=2", headers=auth_headers).json()
+        assert first_page["total"] == 5
+        seen = [c["id"] for c in first_page["clients"]]
+        cursor = first_page["next_cursor"]
+        while cursor is not None:
+            page = client.get(f"/clients/?per_page=2&cursor={cursor}", headers=auth_headers).json()
+            assert page["total"] is None
+            seen += [c["id"] for c in page["clients"]]
+            cursor = page["next_cursor"]
+
+        assert seen == sorted(created_ids, reverse=True)
+
+    def test_list_clients_last_page_has_no_cursor(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        """Test a page that reaches the end returns no next_cursor"""
+        client.post("/clients/", headers=auth_headers, json=make_client_payload("Company", "contact@test.com"))
+
+        response = client.get("/clients/?per_page=10", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
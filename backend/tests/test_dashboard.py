@@ -0,0 +1,50 @@
+"""
+Dashboard Tests
+
+Tests for the monthly trend view refresh:
+- Writes mark mv_monthly_doc_counts for refresh
+- Refreshes are serialised by an advisory lock
+"""
+
+from unittest.mock import MagicMock
+
+from app.api import dashboard
+
+
+def executed_sql(db: MagicMock) -> list:
+    return [str(call.args[0]) for call in db.execute.call_args_list]
+
+
+class TestMonthlyDocCountsRefresh:
+    """Test refreshing the dashboard's monthly trend view"""
+
+    def test_invalidation_marks_view_stale(self):
+        """Test invalidating the statistics also schedules a view refresh"""
+        dashboard._monthly_doc_counts_stale.clear()
+
+        dashboard.invalidate_dashboard_statistics()
+
+        assert dashboard._monthly_doc_counts_stale.is_set()
+
+    def test_refresh_takes_advisory_lock(self):
+        """Test a refresh waits on the advisory lock before refreshing the view"""
+        db = MagicMock()
+
+        assert dashboard.refresh_monthly_doc_counts(db)
+
+        statements = executed_sql(db)
+        assert "pg_advisory_xact_lock" in statements[0]
+        assert "REFRESH MATERIALIZED VIEW CONCURRENTLY mv_monthly_doc_counts" in statements[1]
+        db.commit.assert_called_once()
+
+    def test_refresh_skipped_when_lock_held(self):
+        """Test the background refresh is skipped while another process holds the lock"""
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = False
+
+        assert not dashboard.refresh_monthly_doc_counts(db, wait=False)
+
+        statements = executed_sql(db)
+        assert len(statements) == 1
+        assert "pg_try_advisory_xact_lock" in statements[0]
+        db.rollback.assert_called_once()
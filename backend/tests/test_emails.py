@@ -0,0 +1,160 @@
+"""
+Email API Tests
+
+Tests for email endpoints including:
+- Email settings creation (one row per user)
+- Notification listing and ETag revalidation
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.api.emails import is_duplicate_email_settings
+from app.services.notification_service import NotificationService
+
+
+class TestEmailSettings:
+    """Test email settings creation"""
+
+    def test_create_email_settings(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_user: User
+    ):
+        """Test creating email settings for a user"""
+        response = client.post(
+            "/emails/settings",
+            headers=auth_headers,
+            json={"from_email": "noreply@test.com", "user_id": test_user.id}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["from_email"] == "noreply@test.com"
+        assert data["id"] is not None
+
+    def test_create_email_settings_duplicate_rejected(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_user: User
+    ):
+        """Test a second settings row for the same user is rejected"""
+        settings_data = {"from_email": "noreply@test.com", "user_id": test_user.id}
+        client.post("/emails/settings", headers=auth_headers, json=settings_data)
+
+        response = client.post("/emails/settings", headers=auth_headers, json=settings_data)
+
+        assert response.status_code == 400
+        assert "already exist" in response.json()["detail"]
+
+    def test_only_user_index_violation_is_duplicate(self):
+        """Test other integrity errors (e.g. the user_id foreign key) are not reported as duplicates"""
+        class Diag:
+            def __init__(self, constraint_name):
+                self.constraint_name = constraint_name
+
+        class PgError(Exception):
+            def __init__(self, constraint_name):
+                super().__init__("violation")
+                self.diag = Diag(constraint_name)
+
+        duplicate = IntegrityError("INSERT", {}, PgError("ix_email_settings_user_id_unique"))
+        missing_user = IntegrityError("INSERT", {}, PgError("email_settings_user_id_fkey"))
+
+        assert is_duplicate_email_settings(duplicate)
+        assert not is_duplicate_email_settings(missing_user)
+
+
+@pytest.fixture(scope="function")
+def test_notifications(db: Session, test_user: User) -> list:
+    """Create two unread notifications for the test user."""
+    return [
+        NotificationService.create_notification(
+            db=db,
+            user_id=test_user.id,
+            title=f"Notification {i}",
+            message="Email sent",
+            notification_type="email_sent"
+        )
+        for i in range(2)
+    ]
+
+
+class TestNotificationListing:
+    """Test notification listing and its ETag revalidation"""
+
+    def test_list_notifications_sets_etag(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_notifications: list
+    ):
+        """Test the listing returns an ETag and counts"""
+        response = client.get("/emails/notifications", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        data = response.json()
+        assert data["total"] == 2
+        assert data["unread_count"] == 2
+
+    def test_list_notifications_not_modified(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_notifications: list
+    ):
+        """Test a matching If-None-Match gets 304 with no body"""
+        etag = client.get("/emails/notifications", headers=auth_headers).headers["ETag"]
+
+        response = client.get(
+            "/emails/notifications",
+            headers={**auth_headers, "If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    def test_etag_changes_after_mark_as_read(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_notifications: list
+    ):
+        """Test marking a notification read invalidates the ETag"""
+        etag = client.get("/emails/notifications", headers=auth_headers).headers["ETag"]
+
+        client.put(f"/emails/notifications/{test_notifications[0].id}/read", headers=auth_headers)
+        response = client.get(
+            "/emails/notifications",
+            headers={**auth_headers, "If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["unread_count"] == 1
+
+    def test_etag_changes_after_delete(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        test_notifications: list
+    ):
+        """Test deleting a notification invalidates the ETag"""
+        etag = client.get("/emails/notifications", headers=auth_headers).headers["ETag"]
+
+        client.delete(f"/emails/notifications/{test_notifications[1].id}", headers=auth_headers)
+        response = client.get(
+            "/emails/notifications",
+            headers={**auth_headers, "If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["total"] == 1
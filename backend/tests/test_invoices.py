@@ -0,0 +1,304 @@
+"""
+Invoice Management API Tests
+
+Tests for invoice endpoints including:
+- Create invoice from an accepted quotation
+- Invoice number generation
+- List invoices with page and (created_at, id) cursor pagination, and the cached total
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from pathlib import Path
+
+from app.models import Invoice, InvoiceCounter, Quotation, Template, User, ActivityLog
+
+INVOICE_DIR = Path("uploads/invoices")
+
+
+@pytest.fixture(scope="function")
+def invoice_template(db: Session, test_user: User) -> Template:
+    """Create a test invoice template."""
+    template = Template(
+        name="Test Invoice Template",
+        template_type="invoice",
+        content={"html": "<p>Test invoice content</p>"},
+        status="saved",
+        file_path="uploads/templates/test_invoice_template.docx",
+        file_name="test_invoice_template.docx",
+        created_by=test_user.id
+    )
+    db.add(template)
+    db.commit()
+    db.refresh(template)
+    return template
+
+
+def make_quotation(db: Session, quotation_number: str, client_id: int, template_id: int, user_id: int) -> Quotation:
+    quotation = Quotation(
+        quotation_number=quotation_number,
+        client_id=client_id,
+        template_id=template_id,
+        selected_contact={"name": "John Doe", "email": "john@testcompany.com"},
+        created_by=user_id,
+        status="accepted"
+    )
+    db.add(quotation)
+    db.commit()
+    db.refresh(quotation)
+    return quotation
+
+
+@pytest.fixture(scope="function")
+def accepted_quotation(db: Session, test_client_data, test_template, test_user: User) -> Quotation:
+    """Create an accepted, new-format quotation."""
+    return make_quotation(db, "Q202510001TST", test_client_data.id, test_template.id, test_user.id)
+
+
+@pytest.fixture(autouse=True)
+def cleanup_invoice_files():
+    """Remove the invoice documents a test generates."""
+    existing = set(INVOICE_DIR.glob("*")) if INVOICE_DIR.exists() else set()
+    yield
+    if INVOICE_DIR.exists():
+        for path in set(INVOICE_DIR.glob("*")) - existing:
+            path.unlink()
+
+
+@patch('app.services.file_storage.file_storage.file_exists', return_value=True)
+@patch('app.services.file_storage.file_storage.get_docx_content', return_value=b"mock docx content")
+class TestInvoiceCreation:
+    """Test invoice creation functionality"""
+
+    @patch('app.services.quotation_filler.quotation_filler.fill_template_with_client_data')
+    def test_create_invoice_success(
+        self,
+        mock_fill_template,
+        mock_get_docx,
+        mock_file_exists,
+        client: TestClient,
+        auth_headers: dict,
+        accepted_quotation: Quotation,
+        invoice_template: Template,
+        db: Session
+    ):
+        """Test successful invoice creation writes the filled document"""
+        mock_fill_template.return_value = (b"filled docx content", ["client_uen"])
+
+        response = client.post(
+            "/invoices/",
+            headers=auth_headers,
+            json={"quotation_id": accepted_quotation.id, "template_id": invoice_template.id}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["invoice_number"] == "I202510001TST-1"
+        assert data["status"] == "unpaid"
+        assert data["file_size"] == len(b"filled docx content")
+        assert data["unfilled_placeholders"] == ["client_uen"]
+        with open(data["file_path"], "rb") as f:
+            assert f.read() == b"filled docx content"
+
+        log = db.query(ActivityLog).filter(ActivityLog.action == "invoice.create").first()
+        assert log is not None
+        assert log.target_id == data["id"]
+
+    @patch('app.services.quotation_filler.quotation_filler.fill_template_with_client_data')
+    def test_create_invoice_fill_failure(
+        self,
+        mock_fill_template,
+        mock_get_docx,
+        mock_file_exists,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session,
+        test_client_data,
+        test_template,
+        test_user: User,
+        invoice_template: Template
+    ):
+        """Test a failed fill creates nothing and allocates no invoice number"""
+        mock_fill_template.side_effect = RuntimeError("corrupt template")
+        legacy_quotation = make_quotation(db, "Q-25-1", test_client_data.id, test_template.id, test_user.id)
+
+        response = client.post(
+            "/invoices/",
+            headers=auth_headers,
+            json={"quotation_id": legacy_quotation.id, "template_id": invoice_template.id}
+        )
+
+        assert response.status_code == 500
+        db.expire_all()
+        assert db.query(Invoice).count() == 0
+        assert db.query(InvoiceCounter).count() == 0
+
+    @patch('app.api.invoices.generate_invoice_number')
+    @patch('app.services.quotation_filler.quotation_filler.fill_template_with_client_data')
+    def test_create_invoice_fills_before_numbering(
+        self,
+        mock_fill_template,
+        mock_generate_number,
+        mock_get_docx,
+        mock_file_exists,
+        client: TestClient,
+        auth_headers: dict,
+        accepted_quotation: Quotation,
+        invoice_template: Template
+    ):
+        """Test the template is filled before an invoice number (and its counter lock) is taken"""
+        def fill(*args):
+            assert not mock_generate_number.called
+            return b"filled docx content", []
+        mock_fill_template.side_effect = fill
+        mock_generate_number.return_value = "I202510001TST-1"
+
+        response = client.post(
+            "/invoices/",
+            headers=auth_headers,
+            json={"quotation_id": accepted_quotation.id, "template_id": invoice_template.id}
+        )
+
+        assert response.status_code == 200
+        assert mock_generate_number.called
+
+
+class TestInvoiceNumberGeneration:
+    """Test invoice number generation"""
+
+    @patch('app.services.file_storage.file_storage.file_exists', return_value=True)
+    @patch('app.services.file_storage.file_storage.get_docx_content', return_value=b"mock docx content")
+    @patch('app.services.quotation_filler.quotation_filler.fill_template_with_client_data',
+           return_value=(b"filled docx content", []))
+    def test_legacy_invoice_numbers_increment(
+        self,
+        mock_fill_template,
+        mock_get_docx,
+        mock_file_exists,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session,
+        test_client_data,
+        test_template,
+        test_user: User,
+        invoice_template: Template
+    ):
+        """Test old-format quotations get INV-{year}-NNNN numbers from the year's counter"""
+        legacy_quotation = make_quotation(db, "Q-25-1", test_client_data.id, test_template.id, test_user.id)
+        invoice_data = {"quotation_id": legacy_quotation.id, "template_id": invoice_template.id}
+
+        response1 = client.post("/invoices/", headers=auth_headers, json=invoice_data)
+        response2 = client.post("/invoices/", headers=auth_headers, json=invoice_data)
+
+        year = datetime.now().year
+        assert response1.json()["invoice_number"] == f"INV-{year}-0001"
+        assert response2.json()["invoice_number"] == f"INV-{year}-0002"
+
+
+def make_invoices(db: Session, quotation: Quotation, invoice_template: Template, count: int,
+                  created_at: list = None) -> list:
+    invoices = [
+        Invoice(
+            invoice_number=f"I202510001TST-{i + 1}",
+            quotation_id=quotation.id,
+            client_id=quotation.client_id,
+            selected_contact=quotation.selected_contact,
+            template_id=invoice_template.id,
+            created_by=quotation.created_by,
+            **({"created_at": created_at[i]} if created_at else {})
+        )
+        for i in range(count)
+    ]
+    db.add_all(invoices)
+    db.commit()
+    return [invoice.id for invoice in invoices]
+
+
+class TestInvoiceListing:
+    """Test invoice listing and pagination"""
+
+    def test_list_invoices_includes_client(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session,
+        accepted_quotation: Quotation,
+        invoice_template: Template
+    ):
+        """Test listed invoices embed their client, with and without a search"""
+        make_invoices(db, accepted_quotation, invoice_template, 2)
+
+        for url in ("/invoices/", "/invoices/?search=Test Company"):
+            data = client.get(url, headers=auth_headers).json()
+            assert data["total"] == 2
+            assert all(invoice["client"]["company_name"] == "Test Company Ltd" for invoice in data["invoices"])
+
+    def test_list_invoices_cursor_paging(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session,
+        accepted_quotation: Quotation,
+        invoice_template: Template
+    ):
+        """Test next_cursor walks every invoice by created_at then id, newest first, without totals"""
+        # Back-dated rows (e.g. imports) make id order differ from created_at
+        # order, and two rows share a created_at
+        now = datetime(2025, 10, 1, 12, 0, 0)
+        created_at = [now, now - timedelta(days=30), now, now - timedelta(days=1), now + timedelta(hours=1)]
+        ids = make_invoices(db, accepted_quotation, invoice_template, 5, created_at=created_at)
+
+        first_page = client.get("/invoices/?per_page=2", headers=auth_headers).json()
+        assert first_page["total"] == 5
+        seen = [invoice["id"] for invoice in first_page["invoices"]]
+        cursor = first_page["next_cursor"]
+        while cursor is not None:
+            page = client.get("/invoices/", params={"per_page": 2, "cursor": cursor}, headers=auth_headers).json()
+            assert page["total"] is None
+            seen += [invoice["id"] for invoice in page["invoices"]]
+            cursor = page["next_cursor"]
+
+        assert seen == [ids[4], ids[2], ids[0], ids[3], ids[1]]
+
+    def test_list_invoices_invalid_cursor(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        """Test a malformed cursor is rejected"""
+        response = client.get("/invoices/?cursor=not-a-cursor", headers=auth_headers)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_list_invoices_total_refreshed_after_delete(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session,
+        accepted_quotation: Quotation,
+        invoice_template: Template
+    ):
+        """Test the total is cached per filter set and dropped when an invoice is deleted"""
+        invoice_ids = make_invoices(db, accepted_quotation, invoice_template, 2)
+        assert client.get("/invoices/", headers=auth_headers).json()["total"] == 2
+
+        # A row written behind the API's back is not counted while the total is cached
+        db.add(Invoice(
+            invoice_number="I202510001TST-3",
+            quotation_id=accepted_quotation.id,
+            client_id=accepted_quotation.client_id,
+            selected_contact=accepted_quotation.selected_contact,
+            template_id=invoice_template.id,
+            created_by=accepted_quotation.created_by
+        ))
+        db.commit()
+        assert client.get("/invoices/", headers=auth_headers).json()["total"] == 2
+
+        client.delete(f"/invoices/{invoice_ids[0]}", headers=auth_headers)
+
+        assert client.get("/invoices/", headers=auth_headers).json()["total"] == 2
+        assert client.get("/invoices/?status=paid", headers=auth_headers).json()["total"] == 0
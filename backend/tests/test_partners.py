@@ -0,0 +1,68 @@
+"""
+Partner Management API Tests
+
+Tests for partner endpoints including:
+- List partners with page and cursor pagination, and the cached total
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models import Partner
+
+
+def create_partner(client: TestClient, headers: dict, company_name: str) -> dict:
+    response = client.post(
+        "/partners/",
+        headers=headers,
+        data={"company_name": company_name, "contact_person_name": "Contact Person"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestPartnerListing:
+    """Test partner listing and pagination"""
+
+    def test_list_partners_cursor_paging(
+        self,
+        client: TestClient,
+        auth_headers: dict
+    ):
+        """Test next_cursor walks every partner newest first, without totals"""
+        created_ids = [create_partner(client, auth_headers, f"Partner {i}")["id"] for i in range(5)]
+
+        first_page = client.get("/partners/?per_page=2", headers=auth_headers).json()
+        assert first_page["total"] == 5
+        seen = [partner["id"] for partner in first_page["partners"]]
+        cursor = first_page["next_cursor"]
+        while cursor is not None:
+            page = client.get(f"/partners/?per_page=2&cursor={cursor}", headers=auth_headers).json()
+            assert page["total"] is None
+            seen += [partner["id"] for partner in page["partners"]]
+            cursor = page["next_cursor"]
+
+        assert seen == sorted(created_ids, reverse=True)
+
+    def test_list_partners_total_cached_until_write(
+        self,
+        client: TestClient,
+        auth_headers: dict,
+        db: Session
+    ):
+        """Test the total is cached per search and dropped on partner create and delete"""
+        partner = create_partner(client, auth_headers, "Partner A")
+        assert client.get("/partners/", headers=auth_headers).json()["total"] == 1
+
+        # A row written behind the API's back is not counted while the total is cached
+        db.add(Partner(company_name="Partner B", contact_person_name="Contact Person"))
+        db.commit()
+        assert client.get("/partners/", headers=auth_headers).json()["total"] == 1
+
+        create_partner(client, auth_headers, "Partner C")
+        assert client.get("/partners/", headers=auth_headers).json()["total"] == 3
+
+        client.delete(f"/partners/{partner['id']}", headers=auth_headers)
+        assert client.get("/partners/", headers=auth_headers).json()["total"] == 2
+        assert client.get("/partners/?search=Partner C", headers=auth_headers).json()["total"] == 1